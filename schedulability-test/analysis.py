@@ -0,0 +1,92 @@
+import math
+from fractions import Fraction
+
+from simulator import task_budgets
+
+# Analytic schedulability test of a task set under EDF with re-execution (no simulation).
+# task_set_info is a list of [id, ET, Period, P_due, P_benign] (with optional N and M, see
+# simulator.task_budgets()) and the deadline of a job is the next period. A job executes at most 1 + N
+# times, so the worst-case budget of a task is (1 + N)·C. If the processor demand of these budgets never
+# exceeds the time, no deadline is ever violated, whatever the outcomes of the executions are.
+
+# Worst-case budgets (1 + N)·C, periods and relative deadlines of the tasks.
+def _budgets(task_set_info, max_reexec):
+  max_reexecs, _ = task_budgets(task_set_info, max_reexec)
+  budgets = [(1 + task_max_reexec) * task_info[1] for task_info, task_max_reexec in zip(task_set_info, max_reexecs)]
+  periods = [task_info[2] for task_info in task_set_info]
+  # Implicit deadlines. Kept apart from the periods so that the test also holds for constrained deadlines.
+  deadlines = list(periods)
+  return budgets, periods, deadlines
+
+# Demand bound function: the execution time of the jobs released and due within [0, t].
+def demand_bound(t, budgets, periods, deadlines):
+  demand = 0
+  for budget, period, deadline in zip(budgets, periods, deadlines):
+    if t >= deadline:
+      demand += ((t - deadline) // period + 1) * budget
+  return demand
+
+# The latest absolute deadline strictly before t (0 if there is none).
+def _previous_deadline(t, periods, deadlines):
+  latest = 0
+  for period, deadline in zip(periods, deadlines):
+    if deadline < t:
+      latest = max(latest, deadline + (t - deadline - 1) // period * period)
+  return latest
+
+# Length of the synchronous busy period, the upper bound of the interval to check when U = 1.
+def _busy_period(budgets, periods):
+  length = sum(budgets)
+  while True:
+    demand = sum(math.ceil(length / period) * budget for budget, period in zip(budgets, periods))
+    if demand == length:
+      return length
+    length = demand
+
+# Quick Processor-demand Analysis (Zhang and Burns, 2009) with the budgets (1 + N)·C.
+# Instead of checking every absolute deadline up to the bound, it walks backwards from the bound,
+# jumping straight to dbf(t) whenever dbf(t) < t. Returns True if no deadline can be violated.
+def qpa_schedulable(task_set_info, max_reexec=0):
+  budgets, periods, deadlines = _budgets(task_set_info, max_reexec)
+  if not budgets:
+    return True
+  utilization = sum(Fraction(budget, period) for budget, period in zip(budgets, periods))
+  if utilization > 1:
+    return False
+
+  if utilization == 1:
+    bound = _busy_period(budgets, periods)
+  else:
+    slack_bound = sum((period - deadline) * Fraction(budget, period)
+                      for budget, period, deadline in zip(budgets, periods, deadlines)) / (1 - utilization)
+    bound = max(max(deadlines), math.ceil(slack_bound))
+
+  min_deadline = min(deadlines)
+  t = _previous_deadline(bound + 1, periods, deadlines)
+  demand = demand_bound(t, budgets, periods, deadlines)
+  while demand <= t and demand > min_deadline:
+    if demand < t:
+      t = demand
+    else:
+      t = _previous_deadline(t, periods, deadlines)
+    demand = demand_bound(t, budgets, periods, deadlines)
+  return demand <= min_deadline
+
+# Probability that a job runs out of its 1 + N executions before M of them succeed.
+def overrun_probability(p_due, max_reexec=0, min_success=1):
+  executions = max_reexec + 1
+  # Fewer than M of the executions succeed.
+  return sum(math.comb(executions, k) * (1 - p_due)**k * p_due**(executions - k)
+             for k in range(min(min_success, executions + 1)))
+
+# Summary rows [ID, NumOverrun, NumViolation, NumTotalScheduled] of a task set passing qpa_schedulable().
+# No deadline is violated and every job gets all its executions, so NumOverrun is the expected number
+# of overruns among the NumTotalScheduled jobs.
+def analytic_summary(task_set_info, timeout, max_reexec=0, min_success=1):
+  max_reexecs, min_successes = task_budgets(task_set_info, max_reexec, min_success)
+  summary = []
+  for task_info, task_max_reexec, task_min_success in zip(task_set_info, max_reexecs, min_successes):
+    total_scheduled = math.floor(timeout/task_info[2])
+    summary.append([task_info[0], total_scheduled * overrun_probability(task_info[3], task_max_reexec, task_min_success),
+                    0, total_scheduled])
+  return summary
@@ -0,0 +1,166 @@
+import argparse
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import analytic_summary, qpa_schedulable
+from fault_stream import seed_sequence
+from simulator import EdfSimulator
+
+# Simulate every task set written by the task set generator (n{n}/u{u}/{UNIT}{x}/TaskSet{i}.csv)
+# and write one table with a row per task set (and policy), keyed by n, u, lambda, the time unit of
+# lambda and the task set id.
+
+BATCH_COLUMNS = ['n', 'u', 'Lambda', 'Unit', 'TaskSet', 'Policy', 'Feasible', 'NumTasks', 'NumOverrun', 'NumViolation',
+                 'NumTotalScheduled', 'Analytic']
+
+# Per-task N and M of the fault-tolerance policies of the generator: a task column or a constant. TMR
+# executes every job three times, which the generator models as N = 3 and M = 3.
+POLICIES = {
+  'Reghenzani': ('N_Reghenzani', 1),
+  'new_Reghenzani': ('N_new_Reghenzani', 1),
+  'RTailor': ('N_RTailor', 1),
+  'new_RTailor': ('new_N_RTailor', 1),
+  'PREFACE': ('N', 'M'),
+  'TMR': (3, 3),
+}
+# Column of the result row with the analytic feasibility verdict of the generator for each policy.
+# PREFACE has none; it is feasible when util_PREFACE < 1.
+FEASIBLE_COLUMNS = {
+  'Reghenzani': 'feasible_Reghenzani',
+  'new_Reghenzani': 'new_feasible_Reghenzani',
+  'RTailor': 'feasible_RTailor',
+  'new_RTailor': 'new_feasible_RTailor',
+  'TMR': 'feasible_TMR',
+}
+
+# Time units of the generator (lb_unit): the number of them in an hour.
+TIME_UNITS = {'HOUR': 1, 'MIN': 60, 'SEC': 3600, 'MSEC': 3600000}
+# The execution times and periods of the generator are in 0.1 ms.
+TIME_UNIT = 1e-4
+
+TASK_SET_PATTERN = re.compile(r'n(\d+)/u(\d+)/([A-Z]+)(\d+)/TaskSet(\d+)\.csv$')
+
+# Task sets under the root directory as (n, u, lambda, time unit, task set id, path), sorted.
+def find_task_sets(root):
+  task_sets = []
+  for directory, _, files in os.walk(root):
+    for file in files:
+      path = os.path.join(directory, file)
+      match = TASK_SET_PATTERN.search(os.path.relpath(path, root).replace(os.sep, '/'))
+      if match is None or match.group(3) not in TIME_UNITS:
+        continue
+      n, u_num, unit, exponent, task_set_id = match.groups()
+      task_sets.append((int(n), int(u_num) / 10, 10.0**-int(exponent), unit, int(task_set_id), path))
+  task_sets.sort(key=lambda task_set: task_set[:5])
+  return task_sets
+
+# Read a task set CSV of the generator: a row of results followed by a row per task.
+# Returns task_set_info ([id, ET, Period, P_due, P_benign] per task, as main.readCSV, plus the N and M
+# of the policy if given) and the analytic feasibility verdict of the generator for the policy (None
+# without a policy).
+# The DUE and SDC portions of the failure rate lb (per lb_unit) are converted to per-execution
+# probabilities as in the generator: p = 1 - (1 - lb * portion)^(ET / k) with k time units per lb_unit.
+def read_task_set(path, lb, unit='HOUR', policy=None):
+  df = pd.read_csv(path)
+  result = df.iloc[0]
+  tasks = df[df['ET'].notna()]
+  k = 3600 / (TIME_UNITS[unit] * TIME_UNIT)
+  # The N and M of the policy, as a column of the task rows or a constant.
+  budgets = POLICIES[policy] if policy is not None else ()
+  task_set_info = []
+  for task in tasks.itertuples(index=False):
+    executions_per_unit = task.ET / k
+    # log1p and expm1 keep the precision of the tiny probabilities.
+    p_due = -math.expm1(executions_per_unit * math.log1p(-lb * task.DUE))
+    p_benign = math.exp(executions_per_unit * math.log1p(-lb * task.SDC))
+    task_set_info.append([int(task.id), int(task.ET), int(task.Period), p_due, p_benign] +
+                         [int(getattr(task, budget)) if isinstance(budget, str) else budget for budget in budgets])
+
+  if policy is None:
+    return task_set_info, None
+  if policy in FEASIBLE_COLUMNS:
+    feasible = str(result[FEASIBLE_COLUMNS[policy]]) == 'True'
+  else:
+    feasible = bool(result['util_PREFACE'] < 1)
+  return task_set_info, feasible
+
+# The simulation configuration shared by every task set in a worker process.
+_worker_config = None
+
+def _init_worker(timeout, max_reexec, min_success, fast_forward, precheck):
+  global _worker_config
+  _worker_config = (timeout, max_reexec, min_success, fast_forward, precheck)
+
+# Simulate one task set under a policy (None: -n and -m) and return its row of BATCH_COLUMNS.
+def _simulate_task_set(job):
+  (n, u, lb, unit, task_set_id, path), policy, seed = job
+  timeout, max_reexec, min_success, fast_forward, precheck = _worker_config
+  task_set_info, feasible = read_task_set(path, lb, unit, policy)
+  analytic = precheck and qpa_schedulable(task_set_info, max_reexec)
+  if analytic:
+    counters = analytic_summary(task_set_info, timeout, max_reexec, min_success)
+  else:
+    result = EdfSimulator(task_set_info, timeout, max_reexec, min_success, seed=seed, log_level='none',
+                          fast_forward=fast_forward).run()
+    counters = result.output_num_violation
+  return [n, u, lb, unit, task_set_id, policy, feasible, len(task_set_info), sum(row[1] for row in counters),
+          sum(row[2] for row in counters), sum(row[3] for row in counters), analytic]
+
+# Simulate the task sets under each policy (POLICIES, or None for max_reexec and min_success) on a
+# process pool. Every task set gets its own seed spawned from seed, in the order of find_task_sets(), so
+# the results do not depend on the number of jobs. The policies of a task set share its seed.
+def run_batch(task_sets, timeout, max_reexec=0, min_success=1, jobs=None, seed=None, fast_forward=False,
+              precheck=False, policies=(None,)):
+  config = (timeout, max_reexec, min_success, fast_forward, precheck)
+  seeds = seed_sequence(seed).spawn(len(task_sets))
+  work = [(task_set, policy, task_set_seed) for task_set, task_set_seed in zip(task_sets, seeds) for policy in policies]
+  if jobs is None:
+    jobs = os.cpu_count()
+
+  if jobs == 1:
+    _init_worker(*config)
+    rows = [_simulate_task_set(job) for job in work]
+  else:
+    # A few chunks per worker keep the pool busy without paying the IPC cost per task set.
+    chunksize = max(1, len(work) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=config) as executor:
+      rows = list(executor.map(_simulate_task_set, work, chunksize=chunksize))
+  return pd.DataFrame(rows, columns=BATCH_COLUMNS)
+
+def main():
+  parser = argparse.ArgumentParser(description="Simulate every task set of the task set generator")
+  parser.add_argument('root', type=str, help="The directory holding the n*/u*/{UNIT}*/TaskSet*.csv files")
+  parser.add_argument('-t', '--timeout', type=int, required=True, help="Total Execution time")
+  parser.add_argument('-n', '--nmax', type=int, default=0, help="Maximum allowed reexecution time")
+  parser.add_argument('-m', '--min', type=int, default=1, help="Minimum required successive non-failure execution")
+  parser.add_argument('-j', '--jobs', type=int, help="Number of worker processes (default: all cores)")
+  parser.add_argument('--seed', type=int, help="Random seed of the DUE/benign outcomes (reproducible runs)")
+  parser.add_argument('--fast-forward', action='store_true', help="Skip the hyperperiods without a DUE")
+  parser.add_argument('--precheck', action='store_true',
+                      help="Do not simulate the task sets passing the processor-demand analysis (see main.py)")
+  parser.add_argument('-p', '--policy', nargs='+', choices=list(POLICIES),
+                      help="Use the per-task N and M of these policies instead of -n and -m (a row per policy)")
+  parser.add_argument('-o', '--output', type=str, default='batch_results.csv', help="The output CSV file name")
+  args = parser.parse_args()
+
+  task_sets = find_task_sets(args.root)
+  if not task_sets:
+    parser.error(f"No TaskSet*.csv under {args.root}.")
+  print(f"Task sets: {len(task_sets)}")
+
+  policies = args.policy if args.policy is not None else [None]
+  df = run_batch(task_sets, args.timeout, args.nmax, args.min, args.jobs, args.seed, args.fast_forward, args.precheck,
+                 policies)
+  df.to_csv(args.output, index=False)
+  print(f"Results written to {args.output}")
+  keys = ['n', 'u', 'Lambda', 'Unit'] if args.policy is None else ['Policy', 'n', 'u', 'Lambda', 'Unit']
+  schedulable = df.groupby(keys)['NumViolation'].apply(lambda violations: np.mean(violations == 0))
+  print(schedulable.rename('SchedulableRate').to_string())
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,116 @@
+import argparse
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+import simulator
+from replication import run_replications
+from simulator import CUSTOM_LEVEL, LOG_LEVELS, EdfSimulator
+from vectorized import VectorizedEdfSimulator
+
+# Build a random task set in the same way the task set generator does (UUniFast with random periods).
+def random_task_set(n, u, p_due, rng):
+  utilizations = []
+  sum_u = u
+  for i in range(1, n):
+    next_sum_u = sum_u * (rng.random() ** (1 / (n - i)))
+    utilizations.append(sum_u - next_sum_u)
+    sum_u = next_sum_u
+  utilizations.append(sum_u)
+
+  task_set_info = []
+  for i in range(0, n):
+    period = rng.randint(500, 10000)
+    execution_time = max(1, int(utilizations[i] * period))
+    task_set_info.append([i, execution_time, period, p_due, 1.0])
+  return task_set_info
+
+def run_once(task_set_info, timeout, max_reexec, min_success, seed, log_level='full'):
+  simulator = EdfSimulator(task_set_info, timeout, max_reexec, min_success, seed=seed, log_level=log_level)
+  start = time.perf_counter()
+  result = simulator.run()
+  elapsed = time.perf_counter() - start
+  return result.num_events, len(result.output_log), elapsed
+
+# Size of an object with its attribute dict, if it has one.
+def _object_size(obj):
+  size = sys.getsizeof(obj)
+  if hasattr(obj, '__dict__'):
+    size += sys.getsizeof(obj.__dict__)
+  return size
+
+# Peak traced memory of a run and the average size of the state of a task.
+# Tracing slows the run down, so it is measured apart from the throughput.
+def measure_memory(task_set_info, timeout, max_reexec, min_success, seed, log_level='full'):
+  simulator = EdfSimulator(task_set_info, timeout, max_reexec, min_success, seed=seed, log_level=log_level)
+  tracemalloc.start()
+  simulator.run()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  task_size = sum(_object_size(task) for task in simulator.tasks) / len(simulator.tasks)
+  return peak, task_size
+
+# Seconds of the replications of a task set with the scalar engine (on one process) and with the
+# vectorized one.
+def compare_replications(task_set_info, timeout, max_reexec, min_success, replications, seed):
+  start = time.perf_counter()
+  run_replications(task_set_info, timeout, max_reexec, min_success, replications, jobs=1, seed=seed)
+  scalar = time.perf_counter() - start
+  start = time.perf_counter()
+  VectorizedEdfSimulator(task_set_info, timeout, max_reexec, min_success, replications, seed=seed).run()
+  return scalar, time.perf_counter() - start
+
+def main_benchmark():
+  parser = argparse.ArgumentParser(description="Events per second of the EDF schedulability test")
+  parser.add_argument('-n', '--ntasks', type=int, nargs='+', default=[5, 50, 500], help="Number of tasks")
+  parser.add_argument('-u', '--utilization', type=float, default=0.9, help="Total utilization")
+  parser.add_argument('-t', '--timeout', type=int, default=1000000, help="Total Execution time")
+  parser.add_argument('-p', '--pdue', type=float, default=0.01, help="P_due of every task")
+  parser.add_argument('-r', '--repeat', type=int, default=3, help="Number of runs per task set size")
+  parser.add_argument('-s', '--seed', type=int, default=0, help="Random seed")
+  parser.add_argument('-l', '--log', choices=LOG_LEVELS, nargs='+', default=['full'], help="Trace levels to compare")
+  parser.add_argument('-m', '--memory', action='store_true',
+                      help="Also measure the peak memory of a run and the bytes of the state of a task")
+  parser.add_argument('--replications', type=int,
+                      help="Also compare the replications per second of the scalar and vectorized engines")
+  parser.add_argument('-v', '--verbose', action='store_true',
+                      help="Enable the VERBOSE trace points (discarded by a NullHandler) to measure their cost")
+  args = parser.parse_args()
+
+  if args.verbose:
+    simulator.logger.setLevel(CUSTOM_LEVEL)
+    simulator.logger.addHandler(logging.NullHandler())
+    simulator.logger.propagate = False
+
+  rng = random.Random(args.seed)
+  task_sets = []
+  header = f"{'n':>6} {'log':>7} {'events':>10} {'rows':>10} {'seconds':>10} {'events/sec':>12}"
+  if args.memory:
+    header += f" {'peak KiB':>10} {'task bytes':>10}"
+  print(header)
+  for n in args.ntasks:
+    task_set_info = random_task_set(n, args.utilization, args.pdue, rng)
+    task_sets.append(task_set_info)
+    for log_level in args.log:
+      best = None
+      for _ in range(args.repeat):
+        num_events, num_rows, elapsed = run_once(task_set_info, args.timeout, 1, 1, args.seed, log_level)
+        if best is None or elapsed < best[2]:
+          best = (num_events, num_rows, elapsed)
+      line = f"{n:>6} {log_level:>7} {best[0]:>10} {best[1]:>10} {best[2]:>10.3f} {best[0] / best[2]:>12.0f}"
+      if args.memory:
+        peak, task_size = measure_memory(task_set_info, args.timeout, 1, 1, args.seed, log_level)
+        line += f" {peak / 1024:>10.0f} {task_size:>10.0f}"
+      print(line)
+
+  if args.replications:
+    print(f"{'n':>6} {'reps':>8} {'scalar/s':>10} {'vector/s':>10} {'speedup':>8}")
+    for n, task_set_info in zip(args.ntasks, task_sets):
+      scalar, vectorized = compare_replications(task_set_info, args.timeout, 1, 1, args.replications, args.seed)
+      print(f"{n:>6} {args.replications:>8} {args.replications / scalar:>10.1f} {args.replications / vectorized:>10.1f} "
+            f"{scalar / vectorized:>8.1f}")
+
+if __name__ == "__main__":
+  main_benchmark()
@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+
+# Outcomes of an execution.
+DUE = 0
+BENIGN = 1
+SDC = 2
+
+# Seed sequence of a seed given as None (fresh entropy), an int or a SeedSequence.
+def seed_sequence(seed=None):
+  if isinstance(seed, np.random.SeedSequence):
+    return seed
+  return np.random.SeedSequence(seed)
+
+# Per-task random streams of the execution outcomes.
+# Every task draws from its own Generator spawned from the seed, so the outcomes of a task do not depend
+# on how the executions of the tasks interleave, and the streams of different seeds spawned from one
+# SeedSequence (e.g., parallel replications) are independent.
+# The outcomes are drawn block_size at a time: DUE with probability p_due, otherwise BENIGN with
+# probability p_benign and SDC with the rest.
+class FaultStream:
+  def __init__(self, p_due, p_benign, seed=None, block_size=1024):
+    self.p_due = list(p_due)
+    self.p_benign = list(p_benign)
+    self.block_size = block_size
+    self.generators = [np.random.default_rng(s) for s in seed_sequence(seed).spawn(len(self.p_due))]
+    self._blocks = [[] for _ in self.p_due]
+    self._positions = [0 for _ in self.p_due]
+    # Executions and DUEs of the blocks used up before the current one.
+    self._num_past_draws = [0 for _ in self.p_due]
+    self._num_past_dues = [0 for _ in self.p_due]
+
+  # Outcome of the next execution of a task.
+  def outcome(self, task_id):
+    position = self._positions[task_id]
+    block = self._blocks[task_id]
+    if position == len(block):
+      block = self._draw_block(task_id)
+      position = 0
+    self._positions[task_id] = position + 1
+    return block[position]
+
+  # Number of executions and DUEs of a task so far.
+  def counts(self, task_id):
+    position = self._positions[task_id]
+    return (self._num_past_draws[task_id] + position,
+            self._num_past_dues[task_id] + self._blocks[task_id][:position].count(DUE))
+
+  def _draw_block(self, task_id):
+    used = self._blocks[task_id]
+    self._num_past_draws[task_id] += len(used)
+    self._num_past_dues[task_id] += used.count(DUE)
+    uniforms = self.generators[task_id].random((2, self.block_size))
+    outcomes = np.where(uniforms[0] < self.p_due[task_id], DUE,
+                        np.where(uniforms[1] < self.p_benign[task_id], BENIGN, SDC))
+    # Python ints are faster to index and compare one by one than NumPy scalars.
+    block = outcomes.tolist()
+    self._blocks[task_id] = block
+    return block
+
+# Fault stream of the fast-forward mode. Instead of drawing every execution, it samples the number of
+# executions until the next DUE of each task from a geometric distribution, so that stretches of
+# executions without a DUE can be skipped with skip(). Benign and SDC executions are not told apart
+# (both are BENIGN); they count the same as a successful execution.
+class GeometricFaultStream:
+  def __init__(self, p_due, seed=None):
+    self.p_due = list(p_due)
+    self.generators = [np.random.default_rng(s) for s in seed_sequence(seed).spawn(len(self.p_due))]
+    self.countdown = [self._draw_countdown(task_id) for task_id in range(len(self.p_due))]
+    self.num_draws = [0 for _ in self.p_due] # Number of executions of each task
+    self.task_dues = [0 for _ in self.p_due] # Number of DUEs of each task
+    self.num_dues = 0 # Number of DUEs of all tasks
+
+  # Number of executions until (and including) the next DUE of a task.
+  def _draw_countdown(self, task_id):
+    p_due = self.p_due[task_id]
+    if p_due <= 0:
+      return math.inf
+    if p_due >= 1:
+      return 1
+    return int(self.generators[task_id].geometric(p_due))
+
+  # Outcome of the next execution of a task.
+  def outcome(self, task_id):
+    self.num_draws[task_id] += 1
+    self.countdown[task_id] -= 1
+    if self.countdown[task_id] == 0:
+      self.countdown[task_id] = self._draw_countdown(task_id)
+      self.task_dues[task_id] += 1
+      self.num_dues += 1
+      return DUE
+    return BENIGN
+
+  # Number of executions and DUEs of a task so far.
+  def counts(self, task_id):
+    return self.num_draws[task_id], self.task_dues[task_id]
+
+  # Skip executions of a task without a DUE. There must be fewer than countdown[task_id].
+  def skip(self, task_id, executions):
+    self.countdown[task_id] -= executions
+    self.num_draws[task_id] += executions
+
+# Log of the likelihood ratio of `executions` executions with `dues` DUEs under the probability p_due
+# against the probability p_sampling they were drawn with (importance sampling).
+def log_likelihood_ratio(executions, dues, p_due, p_sampling):
+  if p_due == p_sampling:
+    return 0.0
+  log_ratio = 0.0
+  for count, p, q in ((dues, p_due, p_sampling), (executions - dues, 1 - p_due, 1 - p_sampling)):
+    if count > 0:
+      if p <= 0:
+        # The outcomes are impossible under p_due.
+        return -math.inf
+      log_ratio += count * (math.log(p) - math.log(q))
+  return log_ratio
@@ -0,0 +1,105 @@
+HISTOGRAM_COLUMNS = ['ID', 'Metric', 'Count', 'P50', 'P99', 'Max']
+# Per-job distributions recorded by EdfSimulator with histograms=True. The response time (from the
+# release to the end of the last execution) and the slack (deadline - end of the last execution) are
+# recorded for the jobs that finish their last execution; the jobs cut at their deadline are counted
+# by NumViolation instead. The number of re-executions is recorded for every job.
+HISTOGRAM_METRICS = ['ResponseTime', 'Slack', 'NumReExec']
+
+# Histogram of non-negative integers in log-linear buckets (as HDR histograms).
+# The values below 2^precision_bits have a bucket each and the larger ones share buckets of a relative
+# width of at most 2^-(precision_bits - 1), so the memory stays fixed (at most 64 · 2^(precision_bits - 1)
+# buckets) however many values are recorded. Histograms of the same precision are merged by adding the
+# counts, e.g., across parallel replications.
+class Histogram:
+  def __init__(self, precision_bits=7):
+    self.precision_bits = precision_bits
+    self._half = 1 << (precision_bits - 1)
+    self.counts = []
+    self.count = 0
+    self.max = 0
+
+  def _index(self, value):
+    shift = value.bit_length() - self.precision_bits
+    if shift <= 0:
+      return value
+    return shift * self._half + (value >> shift)
+
+  # The largest value of a bucket.
+  def _highest_value(self, index):
+    if index < 2 * self._half:
+      return index
+    shift = index // self._half - 1
+    return ((index - shift * self._half + 1) << shift) - 1
+
+  def record(self, value, times=1):
+    if value < 0:
+      raise ValueError(f"The histogram holds non-negative values, got {value}.")
+    index = self._index(value)
+    counts = self.counts
+    if index >= len(counts):
+      counts.extend([0] * (index + 1 - len(counts)))
+    counts[index] += times
+    self.count += times
+    if value > self.max:
+      self.max = value
+
+  # The smallest recorded value v with at least the fraction q of the values <= v, up to the bucket
+  # width (exact below 2^precision_bits). None if the histogram is empty.
+  def quantile(self, q):
+    if self.count == 0:
+      return None
+    rank = max(1, q * self.count)
+    cumulative = 0
+    for index, bucket_count in enumerate(self.counts):
+      cumulative += bucket_count
+      if cumulative >= rank:
+        return min(self._highest_value(index), self.max)
+    return self.max
+
+  def merge(self, other):
+    if other.precision_bits != self.precision_bits:
+      raise ValueError("Only histograms of the same precision can be merged.")
+    if len(other.counts) > len(self.counts):
+      self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+    for index, bucket_count in enumerate(other.counts):
+      self.counts[index] += bucket_count
+    self.count += other.count
+    self.max = max(self.max, other.max)
+    return self
+
+  def copy(self):
+    histogram = Histogram(self.precision_bits)
+    histogram.counts = list(self.counts)
+    histogram.count = self.count
+    histogram.max = self.max
+    return histogram
+
+  # Record the values recorded since previous (an earlier copy of this histogram) times more.
+  def repeat_since(self, previous, times):
+    counts = self.counts
+    for index, previous_count in enumerate(previous.counts):
+      counts[index] += times * (counts[index] - previous_count)
+    for index in range(len(previous.counts), len(counts)):
+      counts[index] *= times + 1
+    self.count += times * (self.count - previous.count)
+
+# Empty histograms of HISTOGRAM_METRICS for each of num_tasks tasks.
+def task_histograms(num_tasks, precision_bits=7):
+  return [{metric: Histogram(precision_bits) for metric in HISTOGRAM_METRICS} for _ in range(num_tasks)]
+
+# Merge the per-task histograms of another run (e.g., a replication) into histograms.
+def merge_task_histograms(histograms, other):
+  for task_histogram, other_task_histogram in zip(histograms, other):
+    for metric in HISTOGRAM_METRICS:
+      task_histogram[metric].merge(other_task_histogram[metric])
+  return histograms
+
+# Rows of HISTOGRAM_COLUMNS (p50, p99 and max of each metric of each task).
+def summarize_histograms(task_set_info, histograms):
+  summary = []
+  for task_info, task_histogram in zip(task_set_info, histograms):
+    for metric in HISTOGRAM_METRICS:
+      histogram = task_histogram[metric]
+      summary.append([task_info[0], metric, histogram.count, histogram.quantile(0.5), histogram.quantile(0.99),
+                      histogram.max if histogram.count else None])
+  return summary
@@ -0,0 +1,249 @@
+import contextlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from fault_stream import seed_sequence
+from histogram import merge_task_histograms, task_histograms
+from simulator import EdfSimulator
+
+REPLICATION_COLUMNS = ['ID', 'NumTotalScheduled', 'OverrunRate', 'OverrunRateLow', 'OverrunRateHigh',
+                       'ViolationRate', 'ViolationRateLow', 'ViolationRateHigh']
+IMPORTANCE_COLUMNS = REPLICATION_COLUMNS + ['EffectiveSampleSize']
+# The weights of the importance sampling have degenerated when the effective sample size of a task is
+# below this fraction of its overruns and violations.
+MIN_EFFECTIVE_FRACTION = 0.1
+
+# The simulation configuration shared by every replication in a worker process.
+_worker_config = None
+
+def _init_worker(task_set_info, timeout, max_reexec, min_success, fast_forward, p_due_sampling=None,
+                 histograms=False):
+  global _worker_config
+  _worker_config = (task_set_info, timeout, max_reexec, min_success, fast_forward, p_due_sampling, histograms)
+
+# Run one replication and return [NumOverrun, NumViolation] of each task, the weighted counts of the
+# importance sampling and the per-task histograms (None unless enabled).
+def _run_replication(seed):
+  task_set_info, timeout, max_reexec, min_success, fast_forward, p_due_sampling, histograms = _worker_config
+  result = EdfSimulator(task_set_info, timeout, max_reexec, min_success, seed=seed, log_level='none',
+                        fast_forward=fast_forward, p_due_sampling=p_due_sampling, histograms=histograms).run()
+  return [[row[1], row[2]] for row in result.output_num_violation], result.weighted_counts, result.histograms
+
+# Independent seeds of the replications spawned from one seed (fresh entropy if None).
+def replication_seeds(replications, seed=None):
+  return seed_sequence(seed).spawn(replications)
+
+# Run the replications of a configuration (the arguments of _init_worker) on a process pool, batch_size
+# replications at a time (all at once if None). Yields the results of _run_replication() batch by batch,
+# so that the caller can stop early. The seeds of the replications do not depend on the batches.
+def _replication_batches(config, replications, jobs=None, seed=None, batch_size=None):
+  root = seed_sequence(seed)
+  if batch_size is None:
+    batch_size = max(replications, 1)
+  if jobs is None:
+    jobs = os.cpu_count()
+  batch_sizes = [min(batch_size, replications - start) for start in range(0, replications, batch_size)]
+
+  if jobs == 1:
+    _init_worker(*config)
+    for size in batch_sizes:
+      yield [_run_replication(s) for s in root.spawn(size)]
+    return
+  with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=config) as executor:
+    for size in batch_sizes:
+      # A few chunks per worker keep the pool busy without paying the IPC cost per replication.
+      chunksize = max(1, size // (jobs * 4))
+      yield list(executor.map(_run_replication, root.spawn(size), chunksize=chunksize))
+
+# Counts as an array of shape (replications, number of tasks, 2) and weighted counts of the results as
+# an array of shape (replications, number of tasks, 3) (None without importance sampling).
+def _to_arrays(results, num_tasks):
+  counts = np.array([result[0] for result in results], dtype=np.int64).reshape(len(results), num_tasks, 2)
+  if not results or results[0][1] is None:
+    return counts, None
+  weighted_counts = np.array([result[1] for result in results], dtype=np.float64).reshape(len(results), num_tasks, 3)
+  return counts, weighted_counts
+
+# Run the replications of a configuration on a process pool.
+# Returns the counts as an array of shape (replications, number of tasks, 2) and the weighted counts.
+def _replicate(config, replications, jobs=None, seed=None):
+  results = []
+  for batch in _replication_batches(config, replications, jobs, seed):
+    results += batch
+  return _to_arrays(results, len(config[0]))
+
+# Run the replications on a process pool.
+# Returns an array of shape (replications, number of tasks, 2) holding NumOverrun and NumViolation.
+# With histograms, also returns the per-task histograms of all the replications merged.
+def run_replications(task_set_info, timeout, max_reexec, min_success, replications, jobs=None, seed=None,
+                     fast_forward=False, histograms=False):
+  config = (task_set_info, timeout, max_reexec, min_success, fast_forward, None, histograms)
+  if not histograms:
+    return _replicate(config, replications, jobs, seed)[0]
+  results = []
+  merged = task_histograms(len(task_set_info))
+  for batch in _replication_batches(config, replications, jobs, seed):
+    for result in batch:
+      merge_task_histograms(merged, result[2])
+    results += batch
+  return _to_arrays(results, len(task_set_info))[0], merged
+
+# Sampling probabilities of the importance sampling: P_due inflated by factor (at most 1).
+def importance_sampling_probabilities(task_set_info, factor):
+  return [min(1.0, task_info[3] * factor) for task_info in task_set_info]
+
+# Run the replications with the DUEs drawn with P_due inflated by factor (importance sampling).
+# Returns the counts as run_replications() and, as an array of shape (replications, number of tasks, 3),
+# the overruns and violations weighted by the likelihood ratios of their hyperperiods with the sum of the
+# squared weights (see EdfSimulator.weigh_job()). The rates of the weighted counts (see
+# summarize_replications()) are unbiased for the real P_due, and rare overruns and violations show up in
+# far fewer replications.
+def run_importance_replications(task_set_info, timeout, max_reexec, min_success, replications, factor,
+                                jobs=None, seed=None, fast_forward=False):
+  p_due_sampling = importance_sampling_probabilities(task_set_info, factor)
+  config = (task_set_info, timeout, max_reexec, min_success, fast_forward, p_due_sampling)
+  return _replicate(config, replications, jobs, seed)
+
+# Kish effective sample size of the weighted overruns and violations of each task: the number of
+# unweighted events that would give the same variance. It collapses when a few events carry most of the
+# weight, and equals the number of events when they all weigh the same.
+def effective_sample_size(weighted_counts):
+  sum_weights = weighted_counts[:, :, 0].sum(axis=0) + weighted_counts[:, :, 1].sum(axis=0)
+  sum_squares = weighted_counts[:, :, 2].sum(axis=0)
+  return np.divide(sum_weights**2, sum_squares, out=np.zeros_like(sum_squares), where=sum_squares > 0)
+
+# Ids of the tasks whose effective sample size is below MIN_EFFECTIVE_FRACTION of their overruns and
+# violations: a few of them carry most of the weight and their rates can't be trusted.
+def degenerate_tasks(task_set_info, counts, weighted_counts):
+  events = counts.sum(axis=(0, 2))
+  ess = effective_sample_size(weighted_counts)
+  return [task_info[0] for task_info, task_events, task_ess in zip(task_set_info, events, ess)
+          if task_events > 0 and task_ess < MIN_EFFECTIVE_FRACTION * task_events]
+
+# Mean and normal-approximation confidence interval of the per-replication rates (one column per task).
+def mean_confidence_interval(rates, confidence=0.95):
+  mean = rates.mean(axis=0)
+  if rates.shape[0] < 2:
+    return mean, mean.copy(), mean.copy()
+  z = NormalDist().inv_cdf(0.5 + confidence / 2)
+  half_width = z * rates.std(axis=0, ddof=1) / np.sqrt(rates.shape[0])
+  return mean, np.maximum(mean - half_width, 0), mean + half_width
+
+# Wilson score interval of the binomial proportions events / trials (element-wise).
+# Unlike the normal approximation, it does not collapse to zero width when no event has been observed:
+# with 0 events, the upper bound is about z^2 / trials.
+def wilson_interval(events, trials, confidence=0.95):
+  z = NormalDist().inv_cdf(0.5 + confidence / 2)
+  trials = np.maximum(trials, 1)
+  proportion = np.minimum(events / trials, 1)
+  denominator = 1 + z**2 / trials
+  center = (proportion + z**2 / (2 * trials)) / denominator
+  half_width = z * np.sqrt(proportion * (1 - proportion) / trials + z**2 / (4 * trials**2)) / denominator
+  # The bounds are exactly 0 and 1 at no event and at events == trials (not rounding errors).
+  low = np.where(proportion == 0, 0.0, np.maximum(center - half_width, 0))
+  high = np.where(proportion == 1, 1.0, np.minimum(center + half_width, 1))
+  return proportion, low, high
+
+# Pooled overrun and violation rates (per scheduled job) of all the replications with their Wilson
+# intervals, each as an array of shape (number of tasks, 2).
+def _pooled_wilson_interval(total_scheduled, counts, confidence=0.95):
+  trials = counts.shape[0] * total_scheduled[:, None]
+  return wilson_interval(counts.sum(axis=0), np.broadcast_to(trials, counts.shape[1:]), confidence)
+
+def _total_scheduled(task_set_info, timeout):
+  return np.array([timeout // task_info[2] for task_info in task_set_info], dtype=np.int64)
+
+# Per-replication overrun and violation rates (per scheduled job).
+def _rates(total_scheduled, counts):
+  # A task with no job scheduled until the timeout has no rate to report.
+  return counts / np.maximum(total_scheduled, 1)[:, None]
+
+# Per-task overrun and violation rates (per scheduled job) with their confidence intervals.
+# weighted_counts are those of importance-sampled replications (None for plain replications), whose
+# weighted overruns and violations give the rates.
+# With wilson, the intervals are the Wilson intervals of the jobs of all the replications pooled (see
+# run_sequential_replications()) instead of the normal approximation over the replications.
+def summarize_replications(task_set_info, timeout, counts, confidence=0.95, weighted_counts=None, wilson=False):
+  total_scheduled = _total_scheduled(task_set_info, timeout)
+  if weighted_counts is not None:
+    counts = weighted_counts[:, :, :2]
+  if wilson and weighted_counts is None:
+    mean, low, high = _pooled_wilson_interval(total_scheduled, counts, confidence)
+    overrun = (mean[:, 0], low[:, 0], high[:, 0])
+    violation = (mean[:, 1], low[:, 1], high[:, 1])
+  else:
+    rates = _rates(total_scheduled, counts)
+    overrun = mean_confidence_interval(rates[:, :, 0], confidence)
+    violation = mean_confidence_interval(rates[:, :, 1], confidence)
+
+  summary = []
+  for i, task_info in enumerate(task_set_info):
+    summary.append([task_info[0], int(total_scheduled[i]),
+                    float(overrun[0][i]), float(overrun[1][i]), float(overrun[2][i]),
+                    float(violation[0][i]), float(violation[1][i]), float(violation[2][i])])
+  return summary
+
+# Run replications batch by batch until the confidence interval of every overrun and violation rate
+# is within ±half_width of the rate, or max_replications have run. At least min_replications run.
+# The intervals are Wilson intervals of the jobs of all the replications pooled, so a rare event never
+# observed so far still has an interval of about z^2 / jobs and keeps the replications going. The
+# tasks without a job scheduled until the timeout have no rate and are left out.
+# Returns the counts of the replications run, as run_replications().
+def run_sequential_replications(task_set_info, timeout, max_reexec, min_success, half_width, max_replications,
+                                jobs=None, seed=None, fast_forward=False, confidence=0.95, min_replications=30,
+                                batch_size=100):
+  config = (task_set_info, timeout, max_reexec, min_success, fast_forward)
+  total_scheduled = _total_scheduled(task_set_info, timeout)
+  results = []
+  with contextlib.closing(_replication_batches(config, max_replications, jobs, seed, batch_size)) as batches:
+    for batch in batches:
+      results += batch
+      if len(results) < min_replications:
+        continue
+      mean, low, high = _pooled_wilson_interval(total_scheduled, _to_arrays(results, len(task_set_info))[0],
+                                                confidence)
+      scheduled = total_scheduled > 0
+      if np.all(np.maximum(high - mean, mean - low)[scheduled] <= half_width):
+        break
+  return _to_arrays(results, len(task_set_info))[0]
+
+# Sequential probability ratio test (Wald) of "a replication violates a deadline with a probability
+# below theta". A replication violates when any task has NumViolation > 0. The test decides between
+# theta·(1 - indifference) and theta·(1 + indifference) with the error probabilities alpha (wrongly
+# below) and beta (wrongly not below), checking the replications one by one in seed order.
+# Returns (True if below theta, False if not, None if undecided after max_replications,
+# number of replications used, number of them with a violation).
+def sprt_violation_probability(task_set_info, timeout, max_reexec, min_success, theta, max_replications, jobs=None,
+                               seed=None, fast_forward=False, alpha=0.05, beta=0.05, indifference=0.1,
+                               batch_size=100):
+  if not 0 < theta < 1:
+    raise ValueError(f"theta must be in (0, 1), got {theta}.")
+  p_below = theta * (1 - indifference)
+  p_above = min(theta * (1 + indifference), 1)
+  violation_step = math.log(p_above / p_below)
+  clean_step = math.log((1 - p_above) / (1 - p_below)) if p_above < 1 else -math.inf
+  accept_above = math.log((1 - beta) / alpha)
+  accept_below = math.log(beta / (1 - alpha))
+
+  config = (task_set_info, timeout, max_reexec, min_success, fast_forward)
+  log_ratio = 0.0
+  num_replications = 0
+  num_violating = 0
+  with contextlib.closing(_replication_batches(config, max_replications, jobs, seed, batch_size)) as batches:
+    for batch in batches:
+      for counts, _, _ in batch:
+        num_replications += 1
+        if any(violations > 0 for _, violations in counts):
+          num_violating += 1
+          log_ratio += violation_step
+        else:
+          log_ratio += clean_step
+        if log_ratio >= accept_above:
+          return False, num_replications, num_violating
+        if log_ratio <= accept_below:
+          return True, num_replications, num_violating
+  return None, num_replications, num_violating
@@ -0,0 +1,90 @@
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from histogram import HISTOGRAM_COLUMNS, summarize_histograms
+from replication import REPLICATION_COLUMNS, run_replications, summarize_replications
+from simulator import LOG_COLUMNS, VIOLATION_COLUMNS, EdfSimulator
+from trace_writer import rows_to_records
+
+# Library entry points of the schedulability test for notebooks and pipelines: the task set is given
+# in memory and the results come back as DataFrames or NumPy arrays, without files or prints. Invalid
+# input raises ValueError instead of exiting.
+
+@dataclass
+class ScheduleResult:
+  summary: object # VIOLATION_COLUMNS per task (DataFrame, or an int64 array of shape (tasks, 4))
+  trace: object # LOG_COLUMNS rows (DataFrame, or trace_writer.TRACE_DTYPE records)
+  num_events: int = 0 # Number of scheduling events
+  histograms: pd.DataFrame = None # HISTOGRAM_COLUMNS rows if enabled
+
+# Convert a task set to task_set_info (see simulator.EdfSimulator).
+# tasks is a DataFrame or a 2-D array with a row per task and the columns of the input CSV files:
+# id, ET, Period, P_due, P_benign and optionally N and M (used if there are at least 7 columns). The
+# ids must be 0, 1, ... in order.
+def to_task_set_info(tasks):
+  values = tasks.to_numpy() if isinstance(tasks, pd.DataFrame) else np.asarray(tasks)
+  if values.ndim != 2 or values.shape[1] < 5:
+    raise ValueError(f"Expected a row per task with at least 5 columns, got the shape {values.shape}.")
+  if values.shape[0] == 0:
+    raise ValueError("No task to process.")
+
+  task_set_info = []
+  for i, row in enumerate(values):
+    task_id, execution_time, period = int(row[0]), int(row[1]), int(row[2])
+    p_due, p_benign = float(row[3]), float(row[4])
+    if task_id != i:
+      raise ValueError(f"The task ids must be 0, 1, ... in order, got {task_id} in row {i}.")
+    if execution_time != row[1] or period != row[2] or execution_time <= 0 or period <= 0:
+      raise ValueError(f"ET and Period of task {task_id} must be positive integers, got {row[1]} and {row[2]}.")
+    if not (0 <= p_due <= 1 and 0 <= p_benign <= 1):
+      raise ValueError(f"P_due and P_benign of task {task_id} must be probabilities, got {p_due} and {p_benign}.")
+    task_info = [task_id, execution_time, period, p_due, p_benign]
+    if values.shape[1] >= 7:
+      max_reexec, min_success = int(row[5]), int(row[6])
+      if max_reexec < 0 or min_success < 1:
+        raise ValueError(f"Task {task_id} needs N >= 0 and M >= 1, got N {max_reexec} and M {min_success}.")
+      task_info += [max_reexec, min_success]
+    task_set_info.append(task_info)
+  return task_set_info
+
+# Read a task set CSV file (see to_task_set_info()).
+def read_task_csv(path):
+  if not path.endswith('.csv'):
+    raise ValueError(f"{path} is not a CSV file.")
+  if not os.path.isfile(path):
+    raise FileNotFoundError(f"No file named {path}.")
+  return to_task_set_info(pd.read_csv(path))
+
+# Simulate a task set (see to_task_set_info()) until the timeout. The keyword arguments are those of
+# EdfSimulator (seed, log_level, fast_forward, p_due_sampling, histograms).
+# Returns a ScheduleResult of DataFrames, or of NumPy arrays with as_frame=False, which is cheaper for
+# sweeps calling it many times. log_level 'none' leaves the trace empty.
+def simulate(tasks, timeout, max_reexec=0, min_success=1, as_frame=True, **simulator_args):
+  if timeout < 0:
+    raise ValueError(f"The timeout must be non-negative, got {timeout}.")
+  task_set_info = to_task_set_info(tasks)
+  result = EdfSimulator(task_set_info, timeout, max_reexec, min_success, **simulator_args).run()
+
+  histograms = None
+  if result.histograms is not None:
+    histograms = pd.DataFrame(summarize_histograms(task_set_info, result.histograms), columns=HISTOGRAM_COLUMNS)
+  if as_frame:
+    summary = pd.DataFrame(result.output_num_violation, columns=VIOLATION_COLUMNS)
+    trace = pd.DataFrame(result.output_log, columns=LOG_COLUMNS)
+  else:
+    summary = np.array(result.output_num_violation, dtype=np.int64).reshape(len(task_set_info), len(VIOLATION_COLUMNS))
+    trace = rows_to_records(result.output_log)
+  return ScheduleResult(summary, trace, result.num_events, histograms)
+
+# Run independent replications of a task set (see to_task_set_info()) on jobs processes and return the
+# per-task rates with their confidence intervals as a DataFrame of REPLICATION_COLUMNS.
+def simulate_replications(tasks, timeout, replications, max_reexec=0, min_success=1, jobs=1, seed=None,
+                          fast_forward=False):
+  if replications <= 0:
+    raise ValueError(f"The number of replications must be positive, got {replications}.")
+  task_set_info = to_task_set_info(tasks)
+  counts = run_replications(task_set_info, timeout, max_reexec, min_success, replications, jobs, seed, fast_forward)
+  return pd.DataFrame(summarize_replications(task_set_info, timeout, counts), columns=REPLICATION_COLUMNS)
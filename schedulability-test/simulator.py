@@ -0,0 +1,588 @@
+import heapq
+import logging
+import math
+import os
+import pickle
+from dataclasses import dataclass
+
+from fault_stream import BENIGN, DUE, SDC, FaultStream, GeometricFaultStream, log_likelihood_ratio
+from histogram import task_histograms
+
+CUSTOM_LEVEL = 15
+logging.addLevelName(CUSTOM_LEVEL, "VERBOSE")
+
+def verbose(self, message, *args, **kwargs):
+  if self.isEnabledFor(CUSTOM_LEVEL):
+    self._log(CUSTOM_LEVEL, message, args, **kwargs)
+
+logging.Logger.verbose = verbose
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = ['Time', 'Action', 'ID', 'ArrivalTime', 'RemainingExecutionTime', 'Deadline', 'Failed', 'NumReExec', 'NumSuccess']
+VIOLATION_COLUMNS = ['ID', 'NumOverrun', 'NumViolation', 'NumTotalScheduled']
+
+# Version of the checkpoint format of EdfSimulator.save_checkpoint().
+CHECKPOINT_VERSION = 3
+# Attributes of EdfSimulator holding the state of a run, saved by save_checkpoint().
+CHECKPOINT_STATE = ['current_time', 'num_events', 'tasks', 'ready_queue', 'release_queue', 'output_num_violation',
+                    'fault_stream', 'histograms', '_next_boundary', '_boundary_snapshot', 'log_ratio',
+                    '_hyperperiod_log_ratio', '_hyperperiod_start', 'weighted_counts']
+
+# Trace levels. 'sparse' records only deadline violations, overruns and reschedules,
+# and 'none' records no trace row (only the counters of output_num_violation).
+LOG_LEVELS = ['full', 'sparse', 'none']
+
+# The state of a task. Slots keep it compact (no per-object dict) and its attributes fast to access.
+# The static parameters of the tasks are held by the simulator in one list per field, indexed by id.
+@dataclass(slots=True)
+class Task:
+  id: int
+  deadline: int
+  arrival_time: int
+  remaining_exec_time: int
+  num_reexec: int
+  num_success: int
+
+@dataclass
+class SimulationResult:
+  output_log: list # Rows of LOG_COLUMNS (the trace sink if one is given)
+  output_num_violation: list # Rows of VIOLATION_COLUMNS
+  num_events: int = 0 # Number of scheduling events (iterations of the scheduler)
+  # Per task [weighted NumOverrun, weighted NumViolation, sum of the squared weights] in the importance
+  # sampling mode (None otherwise)
+  weighted_counts: list = None
+  histograms: list = None # Per-task histograms of histogram.HISTOGRAM_METRICS if enabled
+
+# Per-task N (maximum re-executions) and M (minimum successful executions) of a task set. A task_info
+# row [id, ET, Period, P_due, P_benign, N, M] has its own budgets; a row without them uses max_reexec
+# and min_success.
+def task_budgets(task_set_info, max_reexec=0, min_success=1):
+  max_reexecs = [int(task_info[5]) if len(task_info) > 6 else max_reexec for task_info in task_set_info]
+  min_successes = [int(task_info[6]) if len(task_info) > 6 else min_success for task_info in task_set_info]
+  return max_reexecs, min_successes
+
+# Load a checkpoint saved by EdfSimulator.save_checkpoint().
+def load_checkpoint(path):
+  with open(path, 'rb') as f:
+    state = pickle.load(f)
+  if state.get('version') != CHECKPOINT_VERSION:
+    raise ValueError(f"{path} is not a checkpoint of version {CHECKPOINT_VERSION}.")
+  return state
+
+def print_list(list):
+  for element in list:
+    print(element)
+
+# EDF scheduler simulating a task set until the timeout.
+# task_set_info is a list of [id, ET, Period, P_due, P_benign] with optional per-task N and M
+# (see task_budgets()); max_reexec and min_success apply to the tasks without them.
+# seed is None (fresh entropy), an int or a numpy SeedSequence.
+# Every call of run() starts from time 0, so one simulator can be run many times.
+# trace is an optional sink with append() (e.g., StreamingCsvWriter) receiving the trace rows
+# instead of an in-memory list. log_level is one of LOG_LEVELS.
+# With fast_forward, the number of executions until the next DUE of each task is sampled from a
+# geometric distribution and whole hyperperiods without a DUE are skipped (see fast_forward()).
+# It only keeps the counters, so log_level must be 'none'. When no task can have a DUE, the schedule
+# repeats every hyperperiod, so the fast-forward mode is always used with log_level 'none': the
+# counters are extrapolated after one hyperperiod instead of simulating until the timeout.
+# With p_due_sampling (importance sampling), the DUEs of each task are drawn with these probabilities
+# instead of P_due, and every overrun and violation is also counted weighted by the likelihood ratio of
+# the outcomes drawn in its hyperperiod (see weigh_job()), so that the weighted counts are unbiased
+# estimates for P_due. The weights do not shrink with the timeout, only with the hyperperiod.
+# With checkpoint (a file path), the state of the run is saved every checkpoint_every scheduling events
+# (see save_checkpoint()), and from_checkpoint() and resume() continue the run from the last one.
+# With histograms, the response time, slack and re-executions of every job are recorded in fixed-size
+# per-task histograms (see histogram.HISTOGRAM_METRICS) without keeping the trace.
+class EdfSimulator:
+  def __init__(self, task_set_info, timeout=0, max_reexec=0, min_success=1, seed=None, trace=None,
+               log_level='full', fast_forward=False, p_due_sampling=None, checkpoint=None,
+               checkpoint_every=10000000, histograms=False):
+    if log_level not in LOG_LEVELS:
+      raise ValueError(f"Unknown log level {log_level}. Choose from {LOG_LEVELS}.")
+    if fast_forward and log_level != 'none':
+      raise ValueError("The fast-forward mode skips the trace rows. Use the log level 'none'.")
+    self.task_set_info = task_set_info # Input task set
+    self.trace = trace
+    self.log_level = log_level
+    self._log_all = log_level == 'full'
+    self._log_sparse = log_level != 'none'
+    self._verbose = False
+    self._debug = False
+    self.timeout = timeout # Total Execution Time
+    self.max_reexec = max_reexec
+    self.min_success = min_success
+    self.max_reexecs, self.min_successes = task_budgets(task_set_info, max_reexec, min_success)
+    # Static parameters of the tasks, one list per field indexed by id.
+    self.execution_times = [task_info[1] for task_info in task_set_info]
+    self.periods = [task_info[2] for task_info in task_set_info]
+    self.p_due = [task_info[3] for task_info in task_set_info]
+    self.p_benign = [task_info[4] for task_info in task_set_info]
+    self.p_due_sampling = self.p_due if p_due_sampling is None else list(p_due_sampling)
+    self.importance_sampling = self.p_due_sampling is not self.p_due
+    # Log of the likelihood ratio of each outcome (indexed by DUE, BENIGN and SDC) of each task.
+    self.outcome_log_ratios = None
+    if self.importance_sampling:
+      for p_due, p_sampling in zip(self.p_due, self.p_due_sampling):
+        # The outcomes drawn must be possible under P_due and the other way around.
+        if (p_due > 0) != (p_sampling > 0) or (p_due < 1) != (p_sampling < 1):
+          raise ValueError(f"P_due {p_due} can't be sampled with the probability {p_sampling}.")
+      self.outcome_log_ratios = []
+      for p_due, p_sampling in zip(self.p_due, self.p_due_sampling):
+        log_ratio_due = log_likelihood_ratio(1, 1, p_due, p_sampling)
+        log_ratio_no_due = log_likelihood_ratio(1, 0, p_due, p_sampling)
+        self.outcome_log_ratios.append({DUE: log_ratio_due, BENIGN: log_ratio_no_due, SDC: log_ratio_no_due})
+    if log_level == 'none' and all(p == 0 for p in self.p_due_sampling):
+      fast_forward = True
+    self.fast_forward_enabled = fast_forward
+    self.hyperperiod = math.lcm(*self.periods)
+    # Outcomes of the executions drawn from a per-task stream of the seed.
+    if fast_forward:
+      self.fault_stream = GeometricFaultStream(self.p_due_sampling, seed)
+    else:
+      self.fault_stream = FaultStream(self.p_due_sampling, self.p_benign, seed)
+
+    self.current_time = 0 # Current time
+    self.num_events = 0
+    self.tasks = []
+    self.ready_queue = [] # Heap of (deadline, id, task) of the arrived tasks
+    self.release_queue = [] # Heap of (arrival_time, id, task) of the tasks not arrived yet
+    self.output_log = []
+    self.output_num_violation = []
+    self.checkpoint = checkpoint
+    self.checkpoint_every = checkpoint_every
+    self.histograms_enabled = histograms
+    self.histograms = None
+
+  def run(self):
+    self._resolve_trace_points()
+    self.initialize_tasks()
+    logger.debug("Initial task sets")
+    if self._debug:
+      print_list(self.tasks)
+    return self._finish_run()
+
+  # Continue the run restored by from_checkpoint() until the timeout.
+  def resume(self):
+    self._resolve_trace_points()
+    return self._finish_run()
+
+  def _resolve_trace_points(self):
+    # Resolve the trace points once. A disabled trace point costs one branch on a bool and
+    # never builds its message.
+    self._verbose = logger.isEnabledFor(CUSTOM_LEVEL)
+    self._debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+  def _finish_run(self):
+    self.edf_schedulability_test()
+    return SimulationResult(self.output_log, self.output_num_violation, self.num_events, self.weighted_counts,
+                            self.histograms)
+
+  # Save the state of the run (the time, the tasks and queues, the counters and the random streams) to
+  # the checkpoint file. The file is replaced atomically, so a crash while saving keeps the previous
+  # checkpoint. A streaming trace sink is flushed and only its position is saved; an in-memory trace is
+  # saved with the state.
+  def save_checkpoint(self, path=None):
+    path = path if path is not None else self.checkpoint
+    trace_position = self.output_log.checkpoint() if hasattr(self.output_log, 'checkpoint') else None
+    state = {name: getattr(self, name) for name in CHECKPOINT_STATE}
+    state.update(version=CHECKPOINT_VERSION, task_set_info=self.task_set_info, timeout=self.timeout,
+                 max_reexec=self.max_reexec, min_success=self.min_success, log_level=self.log_level,
+                 fast_forward=self.fast_forward_enabled, p_due_sampling=self.p_due_sampling,
+                 histograms_enabled=self.histograms_enabled,
+                 trace_position=trace_position, output_log=self.output_log if trace_position is None else None)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as f:
+      pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    logger.debug(f"Checkpoint at {self.current_time} saved to {path}")
+
+  # Simulator continuing the run of a checkpoint state (see load_checkpoint()) with resume().
+  # The configuration of the run comes from the checkpoint. trace is the streaming sink of the run
+  # reopened at state['trace_position']; None restores the in-memory trace.
+  @classmethod
+  def from_checkpoint(cls, state, trace=None, checkpoint=None, checkpoint_every=10000000):
+    if trace is None and state['output_log'] is None:
+      raise ValueError("The checkpoint was saved with a streaming trace. Reopen it at its trace position.")
+    p_due_sampling = state['p_due_sampling']
+    if p_due_sampling == [task_info[3] for task_info in state['task_set_info']]:
+      p_due_sampling = None
+    simulator = cls(state['task_set_info'], state['timeout'], state['max_reexec'], state['min_success'],
+                    log_level=state['log_level'], fast_forward=state['fast_forward'],
+                    p_due_sampling=p_due_sampling, checkpoint=checkpoint, checkpoint_every=checkpoint_every,
+                    histograms=state['histograms_enabled'])
+    for name in CHECKPOINT_STATE:
+      setattr(simulator, name, state[name])
+    simulator.trace = trace
+    simulator.output_log = trace if trace is not None else state['output_log']
+    return simulator
+
+  # Add the likelihood ratio of the outcome of an execution of a task finishing now (importance
+  # sampling). An execution finishing at a hyperperiod boundary belongs to the hyperperiod before it.
+  def weigh_outcome(self, task_id, outcome):
+    if self.current_time > self._hyperperiod_start + self.hyperperiod:
+      self._hyperperiod_start = (self.current_time - 1) // self.hyperperiod * self.hyperperiod
+      self._hyperperiod_log_ratio = self.log_ratio
+    self.log_ratio += self.outcome_log_ratios[task_id][outcome]
+
+  # Count an overrun (index 0) or a violation (index 1) of the job of a task ending now, weighted by the
+  # likelihood ratio of the outcomes drawn since the start of its hyperperiod (importance sampling).
+  # Every job ends by its deadline and all the deadlines meet at the hyperperiod boundaries, so each
+  # hyperperiod starts from the same state whatever happened before. The expected weighted count is
+  # then the probability of the event under P_due, while a weight over the whole run would shrink
+  # exponentially with the number of executions. Only the outcomes of the job itself would not do: the
+  # re-executions of the other tasks drawn with the inflated DUEs delay it.
+  def weigh_job(self, task, index):
+    if task.deadline > self._hyperperiod_start + self.hyperperiod:
+      # No outcome drawn in the hyperperiod of the job yet.
+      weight = 1.0
+    else:
+      weight = math.exp(self.log_ratio - self._hyperperiod_log_ratio)
+    weighted_counts = self.weighted_counts[task.id]
+    weighted_counts[index] += weight
+    weighted_counts[2] += weight * weight
+
+  def initialize_tasks(self):
+    self.current_time = 0
+    self.num_events = 0
+    self.tasks = []
+    self.ready_queue = []
+    self.release_queue = []
+    self.output_log = self.trace if self.trace is not None else []
+    self.output_num_violation = []
+    self._next_boundary = 0 # The next hyperperiod boundary to check in the fast-forward mode
+    self._boundary_snapshot = None
+    self.histograms = task_histograms(len(self.task_set_info)) if self.histograms_enabled else None
+    # Log of the likelihood ratio of the outcomes drawn so far, and its value at the start of the
+    # hyperperiod of the last outcome, _hyperperiod_start (importance sampling).
+    self.log_ratio = 0.0
+    self._hyperperiod_log_ratio = 0.0
+    self._hyperperiod_start = 0
+    self.weighted_counts = [[0.0, 0.0, 0.0] for _ in self.task_set_info] if self.importance_sampling else None
+
+    for task_info in self.task_set_info:
+      # Deadline, Arrival Time, remaining execution time, id
+      task = Task(id=task_info[0], deadline=task_info[2], arrival_time=0,
+                  remaining_exec_time=task_info[1], num_reexec=0, num_success=0)
+      self.tasks.append(task)
+      self.enqueue_task(task)
+      if self._log_all:
+        self.output_log.append([self.current_time, 'schedule', task.id, task.arrival_time,
+                    task.remaining_exec_time, task.deadline, -1, 0, 0])
+
+      # Initialize the list storing the number of violation of each task.
+      self.output_num_violation.append([task.id, 0, 0, math.floor(self.timeout/task_info[2])])
+
+  # Skip whole hyperperiods without a DUE (fast-forward mode).
+  # Every task releases a job at each hyperperiod boundary, so the schedule from a boundary to the
+  # next one only depends on the state of the tasks relative to the boundary and on the DUEs. If the
+  # state at this boundary repeats the one at the previous boundary and no DUE occured in between,
+  # the next hyperperiods repeat the last one exactly as long as no task reaches its next DUE. Skip
+  # them at once by adding the counters and executions of the last hyperperiod. Re-executions and
+  # drops caused by a DUE are still simulated one by one.
+  def fast_forward(self):
+    hyperperiod = self.hyperperiod
+    boundary = self._next_boundary
+    self._next_boundary = (self.current_time // hyperperiod + 1) * hyperperiod
+    if self.current_time > boundary:
+      # The boundary has passed between two iterations. Start over from the next one.
+      self._boundary_snapshot = None
+      return
+
+    state = [(task.arrival_time - boundary, task.deadline - boundary, task.remaining_exec_time,
+              task.num_reexec, task.num_success) for task in self.tasks]
+    fault_stream = self.fault_stream
+    previous = self._boundary_snapshot
+    if (previous is not None and previous[0] == boundary - hyperperiod and previous[1] == state
+        and previous[4] == fault_stream.num_dues):
+      executions = [num_draws - previous_draws for num_draws, previous_draws in zip(fault_stream.num_draws, previous[3])]
+      num_skip = (self.timeout - boundary) // hyperperiod
+      for task_id, num_executions in enumerate(executions):
+        if num_executions > 0:
+          num_skip = min(num_skip, (fault_stream.countdown[task_id] - 1) // num_executions)
+
+      if num_skip > 0:
+        if self._verbose:
+          logger.verbose(f"At {boundary}, skip {num_skip} hyperperiods without a DUE.")
+        for row, previous_counters in zip(self.output_num_violation, previous[2]):
+          row[1] += num_skip * (row[1] - previous_counters[0])
+          row[2] += num_skip * (row[2] - previous_counters[1])
+        for task_id, num_executions in enumerate(executions):
+          fault_stream.skip(task_id, num_skip * num_executions)
+        if self.weighted_counts is not None:
+          # The skipped executions have no DUE, so every skipped hyperperiod repeats the weights of the
+          # last one.
+          skipped_log_ratio = sum(num_skip * num_executions * self.outcome_log_ratios[task_id][BENIGN]
+                                  for task_id, num_executions in enumerate(executions))
+          self.log_ratio += skipped_log_ratio
+          self._hyperperiod_log_ratio += skipped_log_ratio
+          self._hyperperiod_start += num_skip * hyperperiod
+          for weighted_counts, previous_weighted_counts in zip(self.weighted_counts, previous[7]):
+            for index, previous_weighted_count in enumerate(previous_weighted_counts):
+              weighted_counts[index] += num_skip * (weighted_counts[index] - previous_weighted_count)
+        self.num_events += num_skip * (self.num_events - previous[5])
+        if self.histograms is not None:
+          for histograms_now, histograms_then in zip(self.histograms, previous[6]):
+            for metric, histogram in histograms_now.items():
+              histogram.repeat_since(histograms_then[metric], num_skip)
+
+        shift = num_skip * hyperperiod
+        boundary += shift
+        self.current_time = boundary
+        self._next_boundary = boundary + hyperperiod
+        self.ready_queue.clear()
+        self.release_queue.clear()
+        for task in self.tasks:
+          task.arrival_time += shift
+          task.deadline += shift
+          self.enqueue_task(task)
+
+    histograms = None
+    if self.histograms is not None:
+      histograms = [{metric: histogram.copy() for metric, histogram in task_histogram.items()}
+                    for task_histogram in self.histograms]
+    weighted_counts = None
+    if self.weighted_counts is not None:
+      weighted_counts = [list(task_weighted_counts) for task_weighted_counts in self.weighted_counts]
+    self._boundary_snapshot = (boundary, state, [(row[1], row[2]) for row in self.output_num_violation],
+                               list(fault_stream.num_draws), fault_stream.num_dues, self.num_events, histograms,
+                               weighted_counts)
+
+  # Put a task to the ready queue if it has arrived. Otherwise, put it to the release queue.
+  def enqueue_task(self, task):
+    if task.arrival_time <= self.current_time:
+      heapq.heappush(self.ready_queue, (task.deadline, task.id, task))
+    else:
+      heapq.heappush(self.release_queue, (task.arrival_time, task.id, task))
+
+  # Move the tasks arriving until the given time from the release queue to the ready queue.
+  def release_tasks(self, until):
+    release_queue = self.release_queue
+    while release_queue and release_queue[0][0] <= until:
+      task = heapq.heappop(release_queue)[2]
+      heapq.heappush(self.ready_queue, (task.deadline, task.id, task))
+
+  def execute_task(self, task, until):
+    execution_time = until - self.current_time
+    if self._verbose:
+      logger.verbose(f"Execute {execution_time}.")
+    if execution_time < 0:
+      raise RuntimeError(f"At {self.current_time}, the time tries to go back to {until}.")
+    elif execution_time == 0:
+      # TODO: Is this an error?
+      logger.warning(f"At {self.current_time}, the task {task.id} is peeked but the execution time is 0.")
+    task.remaining_exec_time = task.remaining_exec_time - execution_time
+    self.current_time = until
+
+  def _schedule_task(self, task, action, deadline, arrival_time, remaining_exec_time, num_reexec, num_success):
+    task.deadline = deadline
+    task.arrival_time = arrival_time
+    task.remaining_exec_time = remaining_exec_time
+    task.num_reexec = num_reexec
+    task.num_success = num_success
+    log = self._log_all or (self._log_sparse and action == 'reschedule')
+    if self._verbose:
+      logger.verbose(f"{action}: At {self.current_time}, task {task.id}, arrival time {task.arrival_time}, exec time {remaining_exec_time}," +
+                     f"deadline {task.deadline}, num_reexec {task.num_reexec}, num_success, {task.num_success}")
+    if log:
+      self.output_log.append([self.current_time, action, task.id, task.arrival_time,
+                      task.remaining_exec_time, task.deadline, -1, task.num_reexec, task.num_success])
+
+  # Record the response time, slack and re-executions of a job ending now (see histogram.HISTOGRAM_METRICS).
+  # finished tells whether its last execution finished or was cut at the deadline.
+  def _record_job(self, task, finished):
+    histograms = self.histograms[task.id]
+    if finished:
+      release_time = task.deadline - self.periods[task.id]
+      histograms['ResponseTime'].record(self.current_time - release_time)
+      histograms['Slack'].record(task.deadline - self.current_time)
+    histograms['NumReExec'].record(task.num_reexec)
+
+  # Reschedule a task.
+  def reschedule_task(self, task, has_due_occured=False):
+    id = task.id
+    current_time = self.current_time
+    execution_time = self.execution_times[id]
+    finished = task.remaining_exec_time == 0
+    task.remaining_exec_time = execution_time
+    if not has_due_occured and task.num_success == self.min_successes[id]:
+      # We don't need to reexecute this task again. Schedule the next task.
+      if self._verbose:
+        logger.verbose(f"At {current_time}, the task {task.id} reaches the minimum required successful execution.")
+    else:
+      # The execution was not successful or the number of successful execution is not enough.
+      if task.num_reexec < self.max_reexecs[id]:
+        # The number of reexecution does not exceed the boundary.
+        if current_time < task.deadline:
+          if self._verbose:
+            logger.verbose(f"Reschedule the task {task.id}. Has DUE occured: {has_due_occured}. The number of successful execution: {task.num_success}")
+          # Can schedule the same task again.
+          self._schedule_task(task, 'reschedule', task.deadline, current_time,
+                     execution_time, task.num_reexec + 1, task.num_success)
+          return
+        elif current_time == task.deadline:
+          # Can't schedule the task again (automatically drop it). Instead, schedule the next task.
+          if self._verbose:
+            logger.verbose(f"Current time {current_time} is identical to the deadline {task.deadline}. Can't re-execute.")
+          self.output_num_violation[task.id][2] += 1
+          if self.weighted_counts is not None:
+            self.weigh_job(task, 1)
+          # The job is counted by NumViolation, so its response time and slack are not recorded.
+          finished = False
+          if self._log_sparse:
+            self.output_log.append([current_time, 'drop(violation)', id, current_time,
+                            task.remaining_exec_time, task.deadline, -1, task.num_reexec, task.num_success])
+        else: # current time > task.deadline
+          raise RuntimeError(f"Current time {current_time} exceeds the deadline {task.deadline}. This must already be handled.")
+      else:
+        # Can't reschedule cause we already re-execute this task with the max allowed time.
+        if self._verbose:
+          logger.verbose(f"Can't reschedule. num_reexec {task.num_reexec} is already {self.max_reexecs[id]}")
+        self.output_num_violation[task.id][1] += 1
+        if self.weighted_counts is not None:
+          self.weigh_job(task, 0)
+        if self._log_sparse:
+          self.output_log.append([current_time, 'drop(overrun)', id, task.arrival_time,
+                          0, task.deadline, -1, task.num_reexec, task.num_success])
+
+    if self.histograms is not None:
+      self._record_job(task, finished)
+    # Schedule the next task
+    # task, action, deadline, arrival_time, remaining_exec_time, num_reexec, num_success
+    self._schedule_task(task, 'schedule', task.deadline + self.periods[id], task.deadline, execution_time, 0, 0)
+
+  def edf_schedulability_test(self):
+    timeout = self.timeout
+    ready_queue = self.ready_queue
+    release_queue = self.release_queue
+    output_log = self.output_log
+    log_all = self._log_all
+    log_sparse = self._log_sparse
+    verbose = self._verbose
+    debug = self._debug
+    fault_stream = self.fault_stream
+    fast_forward = self.fast_forward_enabled
+    importance_sampling = self.importance_sampling
+    checkpoint_every = self.checkpoint_every
+    next_checkpoint = self.num_events + checkpoint_every if self.checkpoint is not None else math.inf
+    while self.current_time < timeout:
+      if self.num_events >= next_checkpoint:
+        # The state at the top of the loop is all a resumed run needs.
+        self.save_checkpoint()
+        next_checkpoint = self.num_events + checkpoint_every
+      if fast_forward and self.current_time >= self._next_boundary:
+        self.fast_forward()
+        if self.current_time >= timeout:
+          break
+      self.num_events += 1
+      self.release_tasks(self.current_time)
+
+      if not ready_queue:
+        # No task to execute at this time. Advance to the earliest task's arrival time or timeout time.
+        if log_all:
+          output_log.append([self.current_time, 'IDLE', -1, -1, -1, -1, -1, -1, -1])
+        self.current_time = min(release_queue[0][0], timeout)
+      else:
+        # The ready task with the earliest deadline (the lowest id on a tie).
+        task_to_process = heapq.heappop(ready_queue)[2]
+        if verbose:
+          logger.verbose(f"ID of the task to process is {task_to_process.id}")
+        if log_all:
+          output_log.append([self.current_time, 'run', task_to_process.id, task_to_process.arrival_time,
+                         task_to_process.remaining_exec_time, task_to_process.deadline, -1,
+                         task_to_process.num_reexec, task_to_process.num_success])
+
+        # Check whether this task would be preempted.
+        # Release the tasks arriving before this task finishes in the order of their arrival time.
+        # The first one with an earlier deadline preempts this task.
+        expected_finish_time = self.current_time + task_to_process.remaining_exec_time
+        release_limit = min(task_to_process.deadline, timeout)
+        task_to_preempt = None
+        while (release_queue and release_queue[0][0] < expected_finish_time
+               and release_queue[0][0] <= release_limit):
+          task = heapq.heappop(release_queue)[2]
+          heapq.heappush(ready_queue, (task.deadline, task.id, task))
+          if task.deadline < task_to_process.deadline:
+            task_to_preempt = task
+            break
+
+        if task_to_preempt is not None:
+          # The task task_to_preempt will preempt this task.
+          # It arrives no later than the deadline and timeout, so just run the current task and preempt.
+          self.execute_task(task_to_process, task_to_preempt.arrival_time)
+
+          if verbose:
+            logger.verbose(f"At {task_to_preempt.arrival_time}, preemption occurs")
+          if log_all:
+            output_log.append([self.current_time, 'pause', task_to_process.id, task_to_process.arrival_time,
+                           task_to_process.remaining_exec_time, task_to_process.deadline, -1,
+                           task_to_process.num_reexec, task_to_process.num_success])
+        else:
+          # There is no task to preempt task_to_process.
+          if verbose:
+            logger.verbose(f"No preemption happens during the task {task_to_process.id}'s execution time")
+          # Compare the expected finish time, deadline, and timeout.
+          time_to_advance = min(expected_finish_time, task_to_process.deadline, timeout)
+
+          if time_to_advance == expected_finish_time:
+            # Normal case. No violation.
+            # Finish the current task
+            self.execute_task(task_to_process, expected_finish_time)
+
+            # Check whether the task has failed. If it has failed, rescheudle it.
+            has_due_occured = False
+            outcome = fault_stream.outcome(task_to_process.id)
+            if importance_sampling:
+              self.weigh_outcome(task_to_process.id, outcome)
+            if outcome == DUE:
+              if verbose:
+                logger.verbose(f"The test has failed with the proability {self.p_due[task_to_process.id]}")
+              has_due_occured = True
+            elif outcome == BENIGN:
+              if verbose:
+                logger.verbose(f"The test has succeeded with the proability {self.p_benign[task_to_process.id]}.")
+              task_to_process.num_success += 1
+            else:
+              if verbose:
+                logger.verbose(f"SDC occurs with the proability {1 - self.p_due[task_to_process.id] - self.p_benign[task_to_process.id]}.")
+              task_to_process.num_success += 1
+              # TODO: If majority voting happens, SDC rate should decreased.
+            if log_all:
+              output_log.append([self.current_time, 'finish', task_to_process.id, task_to_process.arrival_time,
+                             task_to_process.remaining_exec_time, task_to_process.deadline, has_due_occured,
+                             task_to_process.num_reexec, task_to_process.num_success])
+            # Schedule the next task
+            self.reschedule_task(task_to_process, has_due_occured)
+          elif time_to_advance == task_to_process.deadline:
+            # Deadline violation occurs before the task finishes.
+            # Run the current task until the deadline, drop it, and find the new task to execute.
+            self.execute_task(task_to_process, task_to_process.deadline)
+            if log_sparse:
+              output_log.append([self.current_time, 'drop(violation)', task_to_process.id, task_to_process.arrival_time,
+                            task_to_process.remaining_exec_time, task_to_process.deadline, -1,
+                            task_to_process.num_reexec, task_to_process.num_success])
+
+            # Reschedule the task
+            self.reschedule_task(task_to_process)
+          else:
+            # Timeout occurs before finishing this task
+            self.execute_task(task_to_process, timeout)
+            if log_all:
+              output_log.append([self.current_time, 'exit(timeout)', task_to_process.id, task_to_process.arrival_time,
+                            task_to_process.remaining_exec_time, task_to_process.deadline, -1,
+                            task_to_process.num_reexec, task_to_process.num_success])
+
+        # Put the task back to the ready queue or the release queue.
+        self.enqueue_task(task_to_process)
+
+      if verbose:
+        logger.verbose(f"Advance the current time to {self.current_time}")
+      if debug:
+        print_list(self.tasks)
+      if self.current_time == timeout:
+        logger.debug("Timeout occurs")
+        if log_all:
+          output_log.append([self.current_time, 'timeout', -1, -1, -1, -1, -1, -1, -1])
+      elif self.current_time > timeout:
+        # sys.exit("Error: the current time exceeds the timeout time.")
+        print("Exceed")
@@ -0,0 +1,23 @@
+import pytest
+
+from replication import degenerate_tasks, effective_sample_size, run_importance_replications, summarize_replications
+
+# Importance sampling on a single task whose 1 + N executions always fit in its period. A job overruns
+# exactly when all of them have a DUE, so the overrun rate is P_due^(N + 1) and no job violates.
+@pytest.mark.parametrize('max_reexec, factor, fast_forward', [(1, 1000, False), (1, 1000, True), (2, 2000, True)])
+def test_importance_matches_closed_form(max_reexec, factor, fast_forward):
+  p_due = 1e-4
+  task_set_info = [[0, 2, 6, p_due, 1 - p_due]]
+  # 1000 jobs per replication: a weight of the whole run would collapse (see EdfSimulator.weigh_job()).
+  timeout = 6000
+  counts, weighted_counts = run_importance_replications(task_set_info, timeout, max_reexec, 1, 500, factor,
+                                                        jobs=1, seed=0, fast_forward=fast_forward)
+  summary = summarize_replications(task_set_info, timeout, counts, weighted_counts=weighted_counts)
+  overrun_rate, overrun_low, overrun_high = summary[0][2:5]
+  expected = p_due ** (max_reexec + 1)
+  assert overrun_rate == pytest.approx(expected, rel=0.1)
+  assert overrun_low <= expected <= overrun_high
+  assert summary[0][5] == 0
+  # Every overrun has the same weight, so none of them is lost.
+  assert effective_sample_size(weighted_counts)[0] == pytest.approx(counts.sum())
+  assert degenerate_tasks(task_set_info, counts, weighted_counts) == []
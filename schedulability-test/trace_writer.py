@@ -0,0 +1,196 @@
+import abc
+import csv
+import queue
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+
+from simulator import LOG_COLUMNS
+
+# Action codes of the binary trace.
+ACTIONS = ['schedule', 'run', 'finish', 'pause', 'reschedule', 'drop(violation)', 'drop(overrun)',
+           'exit(timeout)', 'IDLE', 'timeout']
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# One fixed-width record per trace row. 'Failed' is -1 (not checked), 0 (False) or 1 (True).
+TRACE_DTYPE = np.dtype([('Time', '<i8'), ('Action', 'u1'), ('ID', '<i4'), ('ArrivalTime', '<i8'),
+                        ('RemainingExecutionTime', '<i4'), ('Deadline', '<i8'), ('Failed', 'i1'),
+                        ('NumReExec', '<i2'), ('NumSuccess', '<i2')])
+
+# Base of the trace sinks writing the rows to a file while the simulation runs.
+# Rows are collected in chunks and a background thread writes the chunks, so the memory holds at most
+# max_pending_chunks + 1 chunks no matter how long the simulation is. When the writer falls behind,
+# append() blocks until a chunk has been written.
+# position is a (number of rows, file offset) pair returned by checkpoint(). The writer then reopens
+# the file and goes on from there, dropping the rows written after the checkpoint.
+class _StreamingWriter(abc.ABC):
+  def __init__(self, path, chunk_size=10000, max_pending_chunks=4, position=None):
+    self.path = path
+    self.chunk_size = chunk_size
+    self.num_rows = 0
+    self._chunk = []
+    self._queue = queue.Queue(maxsize=max_pending_chunks)
+    self._error = None
+    if position is None:
+      self._file = self._open(path)
+      self._write_header()
+    else:
+      self.num_rows, offset = position
+      self._file = self._reopen(path, offset)
+    self._thread = threading.Thread(target=self._write_chunks, daemon=True)
+    self._thread.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def __len__(self):
+    return self.num_rows
+
+  def append(self, row):
+    self._chunk.append(row)
+    if len(self._chunk) >= self.chunk_size:
+      self._submit()
+
+  def _submit(self):
+    if self._error is not None:
+      raise self._error
+    self.num_rows += len(self._chunk)
+    self._queue.put(self._chunk)
+    self._chunk = []
+
+  # Write the rows appended so far to the file and return the position to reopen it at (see
+  # EdfSimulator.save_checkpoint()).
+  def checkpoint(self):
+    if self._chunk:
+      self._submit()
+    self._queue.join()
+    if self._error is not None:
+      raise self._error
+    self._file.flush()
+    return self.num_rows, self._file.tell()
+
+  def _write_chunks(self):
+    while True:
+      chunk = self._queue.get()
+      if chunk is None:
+        self._queue.task_done()
+        break
+      if self._error is None:
+        try:
+          self._write_chunk(chunk)
+        except Exception as e:
+          # Keep consuming the queue so that append() never blocks; the error is raised in the caller.
+          self._error = e
+      self._queue.task_done()
+
+  def _open(self, path):
+    return open(path, 'wb')
+
+  # Open the file of an interrupted run and truncate it at offset.
+  def _reopen(self, path, offset):
+    file = open(path, 'r+b')
+    file.seek(offset)
+    file.truncate()
+    return file
+
+  def _write_header(self):
+    pass
+
+  # Write a chunk of rows to the file (in the writer thread).
+  @abc.abstractmethod
+  def _write_chunk(self, chunk):
+    pass
+
+  def _write_footer(self):
+    pass
+
+  # Write the remaining rows and wait for the writer thread.
+  def close(self):
+    if self._file.closed:
+      return
+    if self._chunk:
+      self._submit()
+    self._queue.put(None)
+    self._thread.join()
+    if self._error is None:
+      self._write_footer()
+    self._file.close()
+    if self._error is not None:
+      raise self._error
+
+# Trace sink writing the rows as a CSV file with the columns of output_<name>.csv.
+class StreamingCsvWriter(_StreamingWriter):
+  def __init__(self, path, columns=LOG_COLUMNS, chunk_size=10000, max_pending_chunks=4, position=None):
+    self.columns = columns
+    super().__init__(path, chunk_size, max_pending_chunks, position)
+
+  def _open(self, path):
+    file = open(path, 'w', newline='')
+    self._writer = csv.writer(file, lineterminator='\n')
+    return file
+
+  def _reopen(self, path, offset):
+    # The offset is a tell() cookie of the text file.
+    file = open(path, 'r+', newline='')
+    file.seek(offset)
+    file.truncate()
+    self._writer = csv.writer(file, lineterminator='\n')
+    return file
+
+  def _write_header(self):
+    self._writer.writerow(self.columns)
+
+  def _write_chunk(self, chunk):
+    self._writer.writerows(chunk)
+
+# Header of a .npy file holding `count` records. The header is padded to `length` bytes so that
+# it can be rewritten in place once the number of records is known.
+def _npy_header(dtype, count, length=None):
+  header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,)})
+  if length is None:
+    # Leave room for the largest record count and align the data to 64 bytes.
+    length = (10 + len(header) + 20 + 1 + 63) // 64 * 64
+  header = header.ljust(length - 11) + '\n'
+  return np.lib.format.magic(1, 0) + struct.pack('<H', len(header)) + header.encode('latin1')
+
+_NPY_HEADER_LENGTH = len(_npy_header(TRACE_DTYPE, 0))
+
+# Trace sink writing the rows as a .npy file of TRACE_DTYPE records with the actions as small ints.
+# The file can be memory-mapped with load_trace().
+class StreamingNpyWriter(_StreamingWriter):
+  def _write_header(self):
+    self._file.write(_npy_header(TRACE_DTYPE, 0, _NPY_HEADER_LENGTH))
+
+  def _write_chunk(self, chunk):
+    self._file.write(rows_to_records(chunk).tobytes())
+
+  def _write_footer(self):
+    self._file.seek(0)
+    self._file.write(_npy_header(TRACE_DTYPE, self.num_rows, _NPY_HEADER_LENGTH))
+
+# Convert trace rows (lists of LOG_COLUMNS) to TRACE_DTYPE records.
+def rows_to_records(rows):
+  return np.array([(row[0], ACTION_CODES[row[1]], row[2], row[3], row[4], row[5], int(row[6]), row[7], row[8])
+                   for row in rows], dtype=TRACE_DTYPE)
+
+# Convert TRACE_DTYPE records to a DataFrame with the same columns and values as output_<name>.csv.
+def records_to_dataframe(records):
+  df = pd.DataFrame({column: records[column] for column in LOG_COLUMNS})
+  df['Action'] = np.array(ACTIONS, dtype=object)[records['Action']]
+  # Failed -1, 0 and 1 index the last, first and second element.
+  df['Failed'] = np.array([False, True, -1], dtype=object)[records['Failed']]
+  return df
+
+# Load a trace written as .npy (memory-mapped records unless as_dataframe) or .csv.
+def load_trace(path, as_dataframe=True):
+  if path.endswith('.csv'):
+    return pd.read_csv(path)
+  records = np.load(path, mmap_mode='r')
+  if as_dataframe:
+    return records_to_dataframe(records)
+  return records
@@ -0,0 +1,149 @@
+import numpy as np
+
+from simulator import EdfSimulator, task_budgets
+
+INF = np.iinfo(np.int64).max
+
+# EDF scheduler advancing many replications of the same task set in lockstep.
+# The scheduler state is held in (replications x tasks) arrays and every iteration handles one
+# scheduling event of each replication, so the Python overhead is paid once per event for all of them.
+# It follows the decisions of EdfSimulator but only keeps the counters, not the trace.
+class VectorizedEdfSimulator:
+  def __init__(self, task_set_info, timeout=0, max_reexec=0, min_success=1, replications=1, seed=None,
+               batch_size=10000):
+    self.task_set_info = task_set_info
+    self.timeout = timeout
+    self.max_reexec = max_reexec
+    self.min_success = min_success
+    self.replications = replications
+    # The replications are simulated in batches to bound the memory of the state arrays.
+    self.batch_size = batch_size
+    self.rng = np.random.default_rng(seed)
+
+    self.execution_time = np.array([task_info[1] for task_info in task_set_info], dtype=np.int64)
+    self.period = np.array([task_info[2] for task_info in task_set_info], dtype=np.int64)
+    self.p_due = np.array([task_info[3] for task_info in task_set_info], dtype=np.float64)
+    max_reexecs, min_successes = task_budgets(task_set_info, max_reexec, min_success)
+    self.max_reexecs = np.array(max_reexecs, dtype=np.int64)
+    self.min_successes = np.array(min_successes, dtype=np.int64)
+
+  # Returns an array of shape (replications, number of tasks, 2) holding NumOverrun and NumViolation.
+  def run(self):
+    # Without DUEs every replication follows the same schedule, so the counters of one EdfSimulator run
+    # (which extrapolates them after the first hyperperiod) are those of all of them.
+    if not self.p_due.any():
+      result = EdfSimulator(self.task_set_info, self.timeout, self.max_reexec, self.min_success, log_level='none').run()
+      counts = np.array([[row[1], row[2]] for row in result.output_num_violation], dtype=np.int64)
+      return np.tile(counts, (self.replications, 1, 1))
+    counts = []
+    for start in range(0, self.replications, self.batch_size):
+      counts.append(self._run_batch(min(self.batch_size, self.replications - start)))
+    if not counts:
+      return np.zeros((0, len(self.task_set_info), 2), dtype=np.int64)
+    return np.concatenate(counts)
+
+  def _run_batch(self, replications):
+    timeout = self.timeout
+    n = len(self.task_set_info)
+    self.current_time = np.zeros(replications, dtype=np.int64)
+    self.deadline = np.tile(self.period, (replications, 1))
+    self.arrival_time = np.zeros((replications, n), dtype=np.int64)
+    self.remaining_exec_time = np.tile(self.execution_time, (replications, 1))
+    self.num_reexec = np.zeros((replications, n), dtype=np.int64)
+    self.num_success = np.zeros((replications, n), dtype=np.int64)
+    self.counts = np.zeros((replications, n, 2), dtype=np.int64)
+
+    # Every step works on whole arrays with masks instead of gathering the rows of each case, and picks the
+    # entry of the chosen task of each replication with a flat index (row * n + column) into the raveled
+    # (replications x tasks) arrays, which NumPy indexes much faster than row and column arrays.
+    row_offset = np.arange(replications, dtype=np.int64) * n
+    deadline = self.deadline
+    arrival_time = self.arrival_time
+    flat_deadline = deadline.ravel()
+    flat_remaining_exec_time = self.remaining_exec_time.ravel()
+    flat_num_success = self.num_success.ravel()
+    while True:
+      current_time = self.current_time
+      active = current_time < timeout
+      if not active.any():
+        break
+
+      # The ready task with the earliest deadline (the lowest id on a tie), if any.
+      not_ready = arrival_time > current_time[:, None]
+      ready_deadline = np.where(not_ready, INF, deadline)
+      cols = ready_deadline.argmin(axis=1)
+      flat = row_offset + cols
+      any_ready = ready_deadline.ravel()[flat] != INF
+      busy = active & any_ready
+
+      # No task to execute. Advance to the earliest task's arrival time or timeout time.
+      idle = active & ~any_ready
+      if idle.any():
+        current_time = np.where(idle, np.minimum(arrival_time.min(axis=1), timeout), current_time)
+
+      run_deadline = flat_deadline[flat]
+      expected_finish_time = current_time + flat_remaining_exec_time[flat]
+
+      # The first task arriving before the running task finishes (and no later than its deadline and
+      # the timeout) with an earlier deadline preempts it.
+      not_ready &= deadline < run_deadline[:, None]
+      preemption_time = np.where(not_ready, arrival_time, INF).min(axis=1)
+      paused = busy & (preemption_time < expected_finish_time) & (preemption_time <= np.minimum(run_deadline, timeout))
+      flat_remaining_exec_time[flat] -= np.where(paused, preemption_time - current_time, 0)
+
+      # Compare the expected finish time, deadline, and timeout. The running task advances to the
+      # earliest of them (a timeout only moves the time).
+      time_to_advance = np.minimum(np.minimum(expected_finish_time, run_deadline), timeout)
+      running = busy & ~paused
+      finished = running & (time_to_advance == expected_finish_time)
+      violated = running & ~finished & (time_to_advance == run_deadline)
+      self.current_time = np.where(paused, preemption_time, np.where(running, time_to_advance, current_time))
+
+      # Finish the task and check whether a DUE has occured.
+      # Benign and SDC outcomes both count as a successful execution, so only the DUE is drawn.
+      # Deadline violation occurs before the task finishes. The task ran until the deadline and is dropped.
+      done = finished | violated
+      if not done.any():
+        continue
+      rows = np.flatnonzero(done)
+      has_due_occured = np.zeros(rows.size, dtype=bool)
+      finished_rows = finished[rows]
+      has_due_occured[finished_rows] = self.rng.random(np.count_nonzero(finished_rows)) < self.p_due[cols[rows[finished_rows]]]
+      success = finished_rows & ~has_due_occured
+      flat_num_success[flat[rows[success]]] += 1
+      self._reschedule_tasks(rows, cols[rows], has_due_occured)
+
+    return self.counts
+
+  # Vectorized EdfSimulator.reschedule_task for one task (cols) of each replication (rows).
+  def _reschedule_tasks(self, rows, cols, has_due_occured):
+    n = len(self.task_set_info)
+    flat = rows * n + cols
+    flat_deadline = self.deadline.ravel()
+    flat_arrival_time = self.arrival_time.ravel()
+    flat_num_reexec = self.num_reexec.ravel()
+    flat_num_success = self.num_success.ravel()
+    flat_counts = self.counts.reshape(-1, 2)
+    now = self.current_time[rows]
+    task_deadline = flat_deadline[flat]
+    self.remaining_exec_time.ravel()[flat] = self.execution_time[cols]
+
+    completed = ~has_due_occured & (flat_num_success[flat] == self.min_successes[cols])
+    can_reexec = ~completed & (flat_num_reexec[flat] < self.max_reexecs[cols])
+    reexec = can_reexec & (now < task_deadline)
+    violation = can_reexec & (now == task_deadline)
+    overrun = ~completed & ~can_reexec
+
+    # Schedule the same task again.
+    flat_arrival_time[flat[reexec]] = now[reexec]
+    flat_num_reexec[flat[reexec]] += 1
+
+    flat_counts[flat[overrun], 0] += 1
+    flat_counts[flat[violation], 1] += 1
+
+    # Schedule the next task.
+    flat = flat[~reexec]
+    flat_arrival_time[flat] = flat_deadline[flat]
+    flat_deadline[flat] += self.period[cols[~reexec]]
+    flat_num_reexec[flat] = 0
+    flat_num_success[flat] = 0
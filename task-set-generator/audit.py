@@ -0,0 +1,131 @@
+import argparse
+import importlib.util
+import math
+import os
+import random
+import sys
+import time
+
+import mpmath
+
+# Precision audit of the float64 kernels of task_set_generator.py against the 100-digit mpmath kernels.
+# It samples ET 1..10000, every DUE/SDC portion of the profile, lambda 1e-7..1e-1, N 0..9 and odd M, and
+# reports the largest relative error of each kernel and the feasibility verdicts that flip. The exit
+# status is 1 if an error exceeds the tolerance or a verdict flips, so it runs as a regression test.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The generators of both ISA profiles.
+PROFILES = {isa: os.path.join(HERE, isa, 'task_set_generator.py') for isa in ('openrisc', 'riscv')}
+
+# Kernels as (name, arguments of a sample).
+KERNELS = [
+  ('p_fault_Reghenzani', lambda task, lb, n, m: (task, lb, n)),
+  ('p_due_reexec', lambda task, lb, n, m: (task, lb, n)),
+  ('p_fault_RTailor', lambda task, lb, n, m: (task, lb, n)),
+  ('p_sdc', lambda task, lb, n, m: (task, lb, n, m)),
+  ('avg_utilization', lambda task, lb, n, m: (task, lb, n, m)),
+  ('fr_exec', lambda task, lb, n, m: (task,)),
+]
+
+def load_generator(isa, path):
+  spec = importlib.util.spec_from_file_location(f"task_set_generator_{isa}", path)
+  generator = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(generator)
+  return generator
+
+def relative_error(value, reference):
+  if reference == 0:
+    return 0.0 if value == 0 else math.inf
+  return abs(value - reference) / abs(reference)
+
+# A random sample of the parameter space: a task, lambda (as mpf), N and an odd M <= N + 1.
+def sample(generator, rng):
+  due_portion, sdc_portion = rng.choice(generator.due_sdc_rates)
+  # ET and lambda are drawn log-uniformly so that every order of magnitude is covered.
+  execution_time = min(10000, int(10 ** rng.uniform(0, 4)))
+  task = generator.Task(id=0, execution_time=execution_time, period=rng.randint(max(500, execution_time), 10000),
+                        due_portion=float(due_portion), sdc_portion=float(sdc_portion),
+                        fr_index=rng.randrange(len(generator.required_failure_rates_hours)),
+                        max_reexec_Reghenzani=-1, new_max_reexec_Reghenzani=-1, max_reexec_RTailor=-1,
+                        new_max_reexec_RTailor=-1, max_reexec_PREFACE=-1, max_proact_PREFACE=-1)
+  lb = mpmath.mpf(f"{10 ** rng.uniform(-7, -1):.3g}")
+  max_reexec = rng.randint(0, 9)
+  max_proact = rng.randrange(1, max_reexec + 2, 2)
+  return task, lb, max_reexec, max_proact
+
+# The verdicts of generate_task_set() and find_max_proactive() on the probabilities of a sample.
+def verdicts(p):
+  fr_exec = p['fr_exec']
+  return {
+    'Reghenzani N': p['p_fault_Reghenzani'] < fr_exec,
+    'RTailor N': p['p_fault_RTailor'] < fr_exec,
+    'meet_fr M=1': p['p_due_reexec'] + p['p_sdc_1'] < fr_exec,
+    'p_sdc M=1': p['p_sdc_1'] < fr_exec,
+    'PREFACE M': p['p_due_reexec'] + p['p_sdc'] < fr_exec,
+  }
+
+def audit(isa, generator, samples, rng, time_unit):
+  generator.set_time_unit(time_unit)
+  errors = {name: (0.0, None) for name, _ in KERNELS}
+  seconds = {name: [0.0, 0.0] for name, _ in KERNELS}
+  fallbacks = {name: 0 for name, _ in KERNELS}
+  flips = []
+  for _ in range(samples):
+    task, lb, max_reexec, max_proact = sample(generator, rng)
+    values = [{}, {}]
+    for name, arguments in KERNELS:
+      args = arguments(task, lb, max_reexec, max_proact)
+      # The fast kernels take lambda as a float.
+      fast_args = arguments(task, float(lb), max_reexec, max_proact)
+      fast_kernel = getattr(generator, f"_fast_{name}")
+      start = time.perf_counter()
+      fast = fast_kernel(*fast_args)
+      seconds[name][0] += time.perf_counter() - start
+      start = time.perf_counter()
+      precise = getattr(generator, f"compute_{name}_mp")(*args)
+      seconds[name][1] += time.perf_counter() - start
+      if fast is None:
+        fallbacks[name] += 1
+        fast = precise
+      values[0][name], values[1][name] = fast, precise
+      error = relative_error(fast, precise)
+      if error > errors[name][0]:
+        errors[name] = (error, (task.execution_time, task.period, task.due_portion, float(lb), max_reexec, max_proact))
+    values[0]['p_sdc_1'] = generator.compute_p_sdc(task, lb, max_reexec, 1)
+    values[1]['p_sdc_1'] = generator.compute_p_sdc_mp(task, lb, max_reexec, 1)
+    fast_verdicts, precise_verdicts = verdicts(values[0]), verdicts(values[1])
+    for verdict, value in fast_verdicts.items():
+      if value != precise_verdicts[verdict]:
+        flips.append((isa, verdict, task.execution_time, task.period, float(lb), max_reexec, max_proact))
+  return errors, seconds, fallbacks, flips
+
+def main_audit():
+  parser = argparse.ArgumentParser(description="Precision audit of the float64 kernels of the task set generator")
+  parser.add_argument('-s', '--samples', type=int, default=1000, help="Number of samples per profile")
+  parser.add_argument('-p', '--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES),
+                      help="ISA profiles (DUE/SDC portions) to audit")
+  parser.add_argument('-u', '--units', nargs='+', default=['HOUR'], help="Time units of lambda (HOUR MIN SEC MSEC)")
+  parser.add_argument('--tolerance', type=float, default=1e-12, help="Largest relative error accepted")
+  parser.add_argument('--seed', type=int, default=0, help="Random seed")
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  failed = False
+  print(f"{'profile':>9} {'unit':>5} {'kernel':>19} {'max rel err':>12} {'fallbacks':>9} {'fast us':>8} {'mpmath us':>10}  worst (ET, T, DUE, lambda, N, M)")
+  for isa in args.profiles:
+    generator = load_generator(isa, PROFILES[isa])
+    for unit in args.units:
+      errors, seconds, fallbacks, flips = audit(isa, generator, args.samples, rng, generator.TimeUnit[unit])
+      for name, _ in KERNELS:
+        error, worst = errors[name]
+        failed |= error > args.tolerance
+        print(f"{isa:>9} {unit:>5} {name:>19} {error:>12.3e} {fallbacks[name]:>9} "
+              f"{seconds[name][0] / args.samples * 1e6:>8.1f} {seconds[name][1] / args.samples * 1e6:>10.1f}  {worst}")
+      for flip in flips:
+        print(f"Verdict flipped: {flip}")
+      failed |= bool(flips)
+  print("FAIL" if failed else "OK")
+  sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+  main_audit()
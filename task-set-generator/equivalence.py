@@ -0,0 +1,132 @@
+import argparse
+import random
+import sys
+
+from audit import PROFILES, load_generator, sample
+
+# Equivalence check of the N and M searches of task_set_generator.py against the 0..9 candidate loop they
+# replaced. On random tasks of every DUE/SDC portion, lambda 1e-7..1e-1 and time unit, the N of Reghenzani
+# and RTailor (and their new_* N), the N and M of PREFACE and the M of find_max_proactive() at every N must
+# be those of the loop, computed with the same kernels. The exit status is 1 if any decision differs, so it
+# runs as a regression test.
+
+# The decisions of the 0..9 candidate loop of generate_task_set() for one task, as
+# (N Reghenzani, new N Reghenzani, N RTailor, new N RTailor, N PREFACE, M PREFACE). -1 is not found and
+# None is the "n larger than 10" exit of the new_* while loops.
+def reference_decisions(generator, task, lb):
+  fr_exec = generator.compute_fr_exec(task)
+  decisions = [-1] * 6
+  N_Reghenzani_found = False
+  N_RTailor_found = False
+  N_PREFACE_found = False
+  for max_reexec_cand in range(0, 10):
+    p_due_reexec = generator.compute_p_due_reexec(task, lb, max_reexec_cand)
+    p_sdc_m_1 = generator.compute_p_sdc(task, lb, max_reexec_cand, 1)
+
+    # Reghenzani leaves N as is at p_due_reexec + p_sdc_m_1 == fr_exec, RTailor does not.
+    for index, compute_p_fault, meets in ((0, generator.compute_p_fault_Reghenzani, lambda p: p <= fr_exec),
+                                          (2, generator.compute_p_fault_RTailor, lambda p: p < fr_exec)):
+      if decisions[index] != -1 or compute_p_fault(task, lb, max_reexec_cand) >= fr_exec:
+        continue
+      decisions[index] = decisions[index + 1] = max_reexec_cand
+      if not meets(p_due_reexec + p_sdc_m_1) and p_sdc_m_1 < fr_exec:
+        new_max_reexec = max_reexec_cand
+        while True:
+          if new_max_reexec > 10:
+            decisions[index + 1] = None
+            break
+          if generator.compute_p_due_reexec(task, lb, new_max_reexec) + p_sdc_m_1 < fr_exec:
+            decisions[index + 1] = new_max_reexec
+            break
+          new_max_reexec += 1
+    N_Reghenzani_found = decisions[0] != -1
+    N_RTailor_found = decisions[2] != -1
+
+    if not N_PREFACE_found:
+      max_proact = -1
+      for max_proact_cand in range(1, max_reexec_cand + 2, 2):
+        if p_due_reexec + generator.compute_p_sdc(task, lb, max_reexec_cand, max_proact_cand) < fr_exec:
+          max_proact = max_proact_cand
+          break
+      if max_proact != -1:
+        N_PREFACE_found = True
+        decisions[4], decisions[5] = max_reexec_cand, max_proact
+
+    if N_Reghenzani_found and N_RTailor_found and N_PREFACE_found:
+      break
+  return tuple(decisions)
+
+# The smallest odd M from 1 to N + 1 with p_due_reexec + p_sdc_reexec < fr_exec for every N in 0..9, by scanning
+# every odd M (p_sdc_reexec is not monotone in M).
+def reference_max_proactive(generator, task, lb):
+  fr_exec = generator.compute_fr_exec(task)
+  max_proacts = []
+  for max_reexec in range(0, 10):
+    p_due_reexec = generator.compute_p_due_reexec(task, lb, max_reexec)
+    max_proacts.append(next((max_proact for max_proact in range(1, max_reexec + 2, 2)
+                             if p_due_reexec + generator.compute_p_sdc(task, lb, max_reexec, max_proact) < fr_exec), -1))
+  return max_proacts
+
+# The same decisions with the searches generate_task_set() uses.
+def generator_decisions(generator, task, lb):
+  fr_exec = generator.compute_fr_exec(task)
+  decisions = []
+  for compute_p_fault, meets in ((generator.compute_p_fault_Reghenzani, lambda p: p <= fr_exec),
+                                 (generator.compute_p_fault_RTailor, lambda p: p < fr_exec)):
+    max_reexec = generator.find_min_reexec(task, lb, fr_exec, compute_p_fault)
+    new_max_reexec = max_reexec
+    if max_reexec != -1:
+      p_due_reexec = generator.compute_p_due_reexec(task, lb, max_reexec)
+      p_sdc_m_1 = generator.compute_p_sdc(task, lb, max_reexec, 1)
+      if not meets(p_due_reexec + p_sdc_m_1) and p_sdc_m_1 < fr_exec:
+        new_max_reexec = generator.find_min_reexec_with_sdc(task, lb, fr_exec, max_reexec, p_sdc_m_1)
+        if new_max_reexec == -1:
+          new_max_reexec = None
+    decisions += [max_reexec, new_max_reexec]
+  return tuple(decisions) + tuple(generator.find_max_reexec_proact(task, lb))
+
+def check(isa, generator, samples, rng, time_unit):
+  generator.set_time_unit(time_unit)
+  mismatches = []
+  for _ in range(samples):
+    task, lb, _, _ = sample(generator, rng)
+    expected = reference_decisions(generator, task, lb)
+    actual = generator_decisions(generator, task, lb)
+    if actual != expected:
+      mismatches.append((isa, time_unit.name, task.execution_time, task.due_portion, float(lb), expected, actual))
+    # find_max_proactive() at every N, not only at the N that generate_task_set() reaches.
+    expected = reference_max_proactive(generator, task, lb)
+    actual = [generator.find_max_proactive(task, lb, max_reexec, generator.compute_p_due_reexec(task, lb, max_reexec))
+              for max_reexec in range(0, 10)]
+    if actual != expected:
+      mismatches.append((isa, time_unit.name, task.execution_time, task.due_portion, float(lb), expected, actual))
+  return mismatches
+
+def main_equivalence():
+  parser = argparse.ArgumentParser(description="Equivalence check of the N and M searches of the task set generator")
+  parser.add_argument('-s', '--samples', type=int, default=1000, help="Number of samples per profile and time unit")
+  parser.add_argument('-p', '--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES),
+                      help="ISA profiles (DUE/SDC portions) to check")
+  parser.add_argument('-u', '--units', nargs='+', default=['HOUR', 'MIN', 'SEC', 'MSEC'],
+                      help="Time units of lambda (HOUR MIN SEC MSEC)")
+  parser.add_argument('--precise', action='store_true', help="Use the mpmath kernels instead of the float64 fast path")
+  parser.add_argument('--seed', type=int, default=0, help="Random seed")
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  failed = False
+  print(f"{'profile':>9} {'unit':>5} {'samples':>8} {'mismatches':>10}")
+  for isa in args.profiles:
+    generator = load_generator(isa, PROFILES[isa])
+    generator.use_fast_kernels = not args.precise
+    for unit in args.units:
+      mismatches = check(isa, generator, args.samples, rng, generator.TimeUnit[unit])
+      print(f"{isa:>9} {unit:>5} {args.samples:>8} {len(mismatches):>10}")
+      for mismatch in mismatches:
+        print(f"Mismatch (profile, unit, ET, DUE, lambda, loop, search): {mismatch}")
+      failed |= bool(mismatches)
+  print("FAIL" if failed else "OK")
+  sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+  main_equivalence()
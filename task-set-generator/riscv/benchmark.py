@@ -0,0 +1,49 @@
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+
+import mpmath
+
+import task_set_generator as generator
+from task_set_generator import TimeUnit
+
+# Task sets per second of generate_task_set() with the mpmath kernels and with the float64 fast path,
+# starting from empty kernel caches.
+def run(n, lb, u, num_task_sets, seed, fast):
+  generator.use_fast_kernels = fast
+  generator.execution_cache.clear()
+  generator.kernel_cache.clear()
+  random.seed(seed)
+  with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+    start = time.perf_counter()
+    for i in range(num_task_sets):
+      generator.generate_task_set(n, lb, u, directory, i)
+    elapsed = time.perf_counter() - start
+  return num_task_sets / elapsed
+
+def main_benchmark():
+  parser = argparse.ArgumentParser(description="Task sets per second of the task set generator")
+  parser.add_argument('-n', '--ntasks', type=int, nargs='+', default=[5, 10, 25], help="Number of tasks")
+  parser.add_argument('-l', '--lambdas', type=str, nargs='+', default=['1e-7', '1e-5', '1e-3'], help="Failure rates")
+  parser.add_argument('-u', '--utilization', type=str, default='0.3', help="Total utilization")
+  parser.add_argument('-r', '--repeat', type=int, default=10, help="Number of task sets per configuration")
+  parser.add_argument('-s', '--seed', type=int, default=0, help="Random seed")
+  args = parser.parse_args()
+
+  generator.set_time_unit(TimeUnit.HOUR)
+  print(f"{'n':>6} {'lambda':>8} {'mpmath/s':>10} {'float64/s':>10} {'speedup':>8} {'hit rate':>8}")
+  for n in args.ntasks:
+    for lb in args.lambdas:
+      precise = run(n, mpmath.mpf(lb), mpmath.mpf(args.utilization), args.repeat, args.seed, False)
+      fast = run(n, mpmath.mpf(lb), mpmath.mpf(args.utilization), args.repeat, args.seed, True)
+      stats = generator.cache_stats()
+      hits = sum(cache['hits'] for cache in stats.values())
+      hit_rate = hits / max(1, hits + sum(cache['misses'] for cache in stats.values()))
+      print(f"{n:>6} {lb:>8} {precise:>10.1f} {fast:>10.1f} {fast / precise:>8.1f} {hit_rate:>8.1%}")
+  generator.use_fast_kernels = True
+
+if __name__ == "__main__":
+  main_benchmark()
@@ -1,10 +1,13 @@
 import argparse
+from collections import OrderedDict, namedtuple
 from dataclasses import dataclass
 from enum import IntEnum
+import hashlib
 import logging
 import math
 import random
 import os
+import numpy as np
 import pandas as pd
 import sys
 import mpmath
@@ -45,9 +48,11 @@ class Task:
 
 time_unit = mpmath.mpf('1e-4') # Time unit is 0.1 ms.
 k = mpmath.mpf('0')
+k_float = 0.0 # k as a float for the fast path
 
 required_failure_rates_hours = [mpmath.mpf('1e-3'), mpmath.mpf('1e-5'), mpmath.mpf('1e-7'), mpmath.mpf('1e-9')]
 required_failure_rates = []
+lambdas = [1e-7, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1] # Fault rates of main()
 due_sdc_rates = [
     [mpmath.mpf('0.0202'), mpmath.mpf('0.0000141')], 
     [mpmath.mpf('0.0227'), mpmath.mpf('0.0000313')], 
@@ -83,7 +88,7 @@ def uunifast(n, u):
     logger.debug(utilizations)
     return utilizations
 
-def compute_p_fault_Reghenzani(task, lb, max_reexec):
+def compute_p_fault_Reghenzani_mp(task, lb, max_reexec):
   # Convert values to mpmath
   lb_mp = mpmath.mpf(str(lb))
   k_mp = mpmath.mpf(str(k))
@@ -101,7 +106,7 @@ def compute_p_fault_Reghenzani(task, lb, max_reexec):
 
   return float(p_fault_reexec)
 
-def compute_p_due_reexec(task, lb, max_reexec):
+def compute_p_due_reexec_mp(task, lb, max_reexec):
   # Convert values to mpmath
   lb_mp = mpmath.mpf(str(lb))
   due_portion_mp = mpmath.mpf(str(task.due_portion))
@@ -120,7 +125,7 @@ def compute_p_due_reexec(task, lb, max_reexec):
 
   return float(p_due_reexec)
 
-def compute_p_fault_RTailor(task, lb, max_reexec):
+def compute_p_fault_RTailor_mp(task, lb, max_reexec):
   # Convert values to mpmath
   lb_mp = mpmath.mpf(str(lb))
   due_portion_mp = mpmath.mpf(str(task.due_portion))
@@ -140,7 +145,7 @@ def compute_p_fault_RTailor(task, lb, max_reexec):
 
   return float(p_due_sdc_reexec)
 
-def compute_p_sdc(task, lb, max_reexec, max_proact):
+def compute_p_sdc_mp(task, lb, max_reexec, max_proact):
   # Convert values to mpmath
   lb_mp = mpmath.mpf(str(lb))
   due_portion_mp = mpmath.mpf(str(task.due_portion))
@@ -209,48 +214,94 @@ def compute_p_sdc(task, lb, max_reexec, max_proact):
   
   return float(p_sdc_reexec)
 
+MAX_REEXEC_CANDIDATES = 10 # N is searched from 0 to 9.
+
+# The first of candidates (in increasing order) meeting condition, or None, for a condition that stays
+# met once it is met (a monotone probability against a bound).
+# The search starts at the index guess (e.g., from a closed form) and checks its neighbour, so a right
+# guess costs two calls, and bisects what is left, so it never costs more than O(log) calls.
+def first_meeting(candidates, condition, guess=None):
+  low, high = 0, len(candidates) # The first one meeting condition is in [low, high) or there is none.
+  if guess is not None and candidates:
+    guess = min(max(guess, 0), len(candidates) - 1)
+    if condition(candidates[guess]):
+      if guess == 0 or not condition(candidates[guess - 1]):
+        return candidates[guess]
+      high = guess - 1
+    else:
+      if guess + 1 < len(candidates) and condition(candidates[guess + 1]):
+        return candidates[guess + 1]
+      low = guess + 2
+  while low < high:
+    middle = (low + high) // 2
+    if condition(candidates[middle]):
+      high = middle
+    else:
+      low = middle + 1
+  return candidates[low] if low < len(candidates) else None
+
+# The smallest N with p_exec^(1 + N) < bound: 1 + N > log(bound) / log(p_exec). Only a guess for
+# first_meeting(), as the kernels round differently.
+def estimate_min_reexec(p_exec, bound):
+  if p_exec < bound:
+    return 0
+  if bound <= 0 or p_exec >= 1:
+    return None
+  return math.floor(math.log(bound) / math.log(p_exec))
+
+# The smallest N in 0..9 with p_fault_reexec(N) < fr_exec, or -1, for the probability p_fault_reexec
+# = p_exec^(1 + N) of compute_p_fault_Reghenzani, compute_p_fault_RTailor or compute_p_due_reexec.
+def find_min_reexec(task, lb, fr_exec, compute_p_fault_reexec):
+  p_exec = compute_p_fault_reexec(task, lb, 0)
+  if p_exec < fr_exec:
+    return 0
+  guess = estimate_min_reexec(p_exec, fr_exec)
+  max_reexec = first_meeting(range(1, MAX_REEXEC_CANDIDATES),
+                             lambda max_reexec_cand: compute_p_fault_reexec(task, lb, max_reexec_cand) < fr_exec,
+                             None if guess is None else guess - 1)
+  return -1 if max_reexec is None else max_reexec
+
+# The smallest N from min_reexec to 10 with p_due_reexec(N) + p_sdc < fr_exec, or -1.
+def find_min_reexec_with_sdc(task, lb, fr_exec, min_reexec, p_sdc):
+  guess = estimate_min_reexec(compute_p_due_reexec(task, lb, 0), fr_exec - p_sdc)
+  max_reexec = first_meeting(range(min_reexec, 11),
+                             lambda max_reexec_cand: compute_p_due_reexec(task, lb, max_reexec_cand) + p_sdc < fr_exec,
+                             None if guess is None else guess - min_reexec)
+  return -1 if max_reexec is None else max_reexec
+
 def find_max_proactive(task, lb, max_reexec, p_due_reexec):
-  required_fr = required_failure_rates[task.fr_index]
   max_proact = -1
-  
-  # Calculate fr_exec with mpmath precision
-  required_fr_mp = mpmath.mpf(str(required_fr))
-  period_mp = mpmath.mpf(str(task.period))
-  k_mp = mpmath.mpf(str(k))
-  fr_exec = mpmath.mpf('1') - mpmath.power(mpmath.mpf('1') - required_fr_mp, period_mp / k_mp)
-  p_due_reexec_mp = mpmath.mpf(str(p_due_reexec))
-  
+  fr_exec = compute_fr_exec(task)
+
+  # p_sdc_reexec is not monotone in M (a larger M can raise it again), so the odd M are scanned in order
+  # instead of bisected.
   for max_proact_cand in range(1, max_reexec + 2, 2): # from 1 to N + 1, only odd numbers.
     p_sdc_reexec = compute_p_sdc(task, lb, max_reexec, max_proact_cand)
-    p_sdc_reexec_mp = mpmath.mpf(str(p_sdc_reexec))
     
     # Check if p_due_reexec + p_sdc_reexec < fr_exec
-    if p_due_reexec_mp + p_sdc_reexec_mp < fr_exec:
+    if p_due_reexec + p_sdc_reexec < fr_exec:
       max_proact = max_proact_cand
       break
   
   return max_proact
 
 def find_max_reexec_proact(task, lb):
-  required_fr = required_failure_rates[task.fr_index]
   max_reexec = -1
   max_proact = -1
+  fr_exec = compute_fr_exec(task)
   
-  # Calculate fr_exec with mpmath precision
-  required_fr_mp = mpmath.mpf(str(required_fr))
-  period_mp = mpmath.mpf(str(task.period))
-  k_mp = mpmath.mpf(str(k))
-  fr_exec = mpmath.mpf('1') - mpmath.power(mpmath.mpf('1') - required_fr_mp, period_mp / k_mp)
-  
-  for max_reexec_cand in range(0, 10):
+  # p_due_reexec + p_sdc_reexec < fr_exec needs p_due_reexec < fr_exec, so the smaller N are skipped.
+  min_reexec = find_min_reexec(task, lb, fr_exec, compute_p_due_reexec)
+  if min_reexec == -1:
+    return max_reexec, max_proact
+  for max_reexec_cand in range(min_reexec, MAX_REEXEC_CANDIDATES):
     if task.execution_time == 0:
       break
 
     p_due_reexec = compute_p_due_reexec(task, lb, max_reexec_cand)
-    p_due_reexec_mp = mpmath.mpf(str(p_due_reexec))
     
     # Check if p_due_reexec < fr_exec
-    if p_due_reexec_mp < fr_exec:
+    if p_due_reexec < fr_exec:
       max_proact_cand = find_max_proactive(task, lb, max_reexec_cand, p_due_reexec)
       max_proact = max_proact_cand
       if max_proact_cand == -1:
@@ -260,7 +311,7 @@ def find_max_reexec_proact(task, lb):
   
   return max_reexec, max_proact
 
-def compute_avg_utilization(task, lb, max_reexec, max_proact):
+def compute_avg_utilization_mp(task, lb, max_reexec, max_proact):
   # Convert values to mpmath
   lb_mp = mpmath.mpf(str(lb))
   due_portion_mp = mpmath.mpf(str(task.due_portion))
@@ -311,6 +362,261 @@ def compute_avg_utilization(task, lb, max_reexec, max_proact):
   
   return float(avg_utilization)
 
+def compute_fr_exec_mp(task):
+  required_fr_mp = mpmath.mpf(str(required_failure_rates[task.fr_index]))
+  period_mp = mpmath.mpf(str(task.period))
+  k_mp = mpmath.mpf(str(k))
+  return float(mpmath.mpf('1') - mpmath.power(mpmath.mpf('1') - required_fr_mp, period_mp / k_mp))
+
+# Float64 fast path of the kernels above.
+# Every probability of the kernels is built from (1 - x)^a with a tiny x, which log1p/expm1 give to
+# float64 precision: 1 - (1 - x)^a = -expm1(a * log1p(-x)). As p_unit = 1 - (1 - x)^(1/k), an
+# execution of ET time units fails with 1 - (1 - x)^(ET/k). The binomial terms are summed in log space.
+# A fast kernel returns None when its result is too small to keep the float64 precision (its terms
+# underflow), and the mpmath kernel is used instead.
+use_fast_kernels = True # False (--precise) always uses the mpmath kernels
+
+# Below this, a sum of terms may have lost terms to the float64 underflow.
+MIN_PRECISE = sys.float_info.min / sys.float_info.epsilon
+
+# Bounded LRU cache of kernel results with hit and miss counters.
+# The kernels are called again and again with the same task parameters (for every N candidate, TMR,
+# Reghenzani, RTailor, PREFACE and find_max_proactive), so the results are kept by their parameters.
+class KernelCache:
+  def __init__(self, maxsize):
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._entries = OrderedDict()
+
+  # The value of key, computed with compute() on a miss.
+  def get(self, key, compute):
+    entries = self._entries
+    try:
+      value = entries[key]
+    except KeyError:
+      self.misses += 1
+      value = compute()
+      if self.maxsize > 0:
+        entries[key] = value
+        if len(entries) > self.maxsize:
+          entries.popitem(last=False)
+      return value
+    self.hits += 1
+    entries.move_to_end(key)
+    return value
+
+  def resize(self, maxsize):
+    self.maxsize = maxsize
+    while len(self._entries) > max(maxsize, 0):
+      self._entries.popitem(last=False)
+
+  def clear(self):
+    self._entries.clear()
+    self.hits = 0
+    self.misses = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+# Per-execution probabilities keyed by (lb, k, due_portion, sdc_portion, execution_time) (and fr_exec
+# keyed by (required failure rate, k, period)), and the kernel results keyed by the same parameters with N
+# and M.
+execution_cache = KernelCache(100000)
+kernel_cache = KernelCache(100000)
+
+# Hit and miss counters of the caches.
+def cache_stats():
+  return {name: {'hits': cache.hits, 'misses': cache.misses, 'size': len(cache), 'maxsize': cache.maxsize}
+          for name, cache in (('execution', execution_cache), ('kernel', kernel_cache))}
+
+def _checked(result):
+  return result if result >= MIN_PRECISE else None
+
+def _log(x):
+  return math.log(x) if x > 0 else -math.inf
+
+# log of comb(n, j) * p^a * q^b from log p and log q (with 0^0 = 1).
+def _log_binomial_term(n, j, a, log_p, b, log_q):
+  log_term = math.log(math.comb(n, j))
+  if a:
+    log_term += a * log_p
+  if b:
+    log_term += b * log_q
+  return log_term
+
+# Per-execution probabilities of a task in log space:
+# log_q_fault and log_q_due_sdc are log(1 - p) of the faults of any kind and of the DUE and SDC faults,
+# log_p_due and log_q_due are log p_due_exec and log(1 - p_due_exec), and log_p1 and log_p2 are the logs
+# of the SDC and benign shares p1 and p2 of the executions without a DUE (Eq 15).
+ExecutionLogs = namedtuple('ExecutionLogs', ['log_q_fault', 'log_q_due_sdc', 'log_p_due', 'log_q_due', 'log_p1', 'log_p2'])
+
+def _execution_logs(task, lb):
+  key = (lb, k_float, task.due_portion, task.sdc_portion, task.execution_time)
+  return execution_cache.get(key, lambda: _lookup_execution_logs(*key))
+
+# The ExecutionLogs from the table of lb if one is loaded (see load_execution_table()), or computed.
+def _lookup_execution_logs(lb, k_float, due_portion, sdc_portion, execution_time):
+  table = execution_tables.get((lb, k_float))
+  if table is not None and execution_time <= MAX_EXECUTION_TIME:
+    profile = _profile_indices.get((due_portion, sdc_portion))
+    if profile is not None:
+      return ExecutionLogs(*table[profile, execution_time].tolist())
+  return _compute_execution_logs(lb, k_float, due_portion, sdc_portion, execution_time)
+
+def _compute_execution_logs(lb, k_float, due_portion, sdc_portion, execution_time):
+  units = execution_time / k_float
+  log_q_due = units * math.log1p(-lb * due_portion)
+  # p_benign_exec = (1 - p_due_unit - p_sdc_unit)^ET = (1 - p_due_exec) * r with
+  # r = (1 - p_sdc_unit / (1 - p_due_unit))^ET, so p_sdc_exec = (1 - p_due_exec) * (1 - r) without the
+  # cancellation of 1 - (p_benign_exec + p_due_exec), and p1 = 1 - r and p2 = r.
+  log_q_due_unit = math.log1p(-lb * due_portion) / k_float
+  p_sdc_unit = -math.expm1(math.log1p(-lb * sdc_portion) / k_float)
+  log_r = execution_time * math.log1p(-p_sdc_unit / math.exp(log_q_due_unit))
+  return ExecutionLogs(log_q_fault=units * math.log1p(-lb),
+                       log_q_due_sdc=units * math.log1p(-lb * (due_portion + sdc_portion)),
+                       log_p_due=_log(-math.expm1(log_q_due)), log_q_due=log_q_due,
+                       log_p1=_log(-math.expm1(log_r)), log_p2=log_r)
+
+# Precomputed tables of the per-execution probabilities.
+# The execution times are at most the largest period and the DUE/SDC portions and the lambdas are fixed,
+# so the ExecutionLogs of every (DUE/SDC portion, ET) are computed once per lambda and time unit and
+# saved as an array of shape (portions, MAX_EXECUTION_TIME + 1, 6) in TABLE_DIRECTORY. The file name
+# hashes the parameters, so a changed profile builds a new table. The tables are memory-mapped: the
+# processes using a table share the pages of its file instead of each building a copy.
+MAX_EXECUTION_TIME = 10000 # The largest period
+TABLE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+execution_tables = {} # (lb, k) -> table loaded by load_execution_table()
+use_tables = False # True (--tables) loads the table of each lambda in main_loop()
+_profile_indices = {(float(due_portion), float(sdc_portion)): index
+                    for index, (due_portion, sdc_portion) in enumerate(due_sdc_rates)}
+
+def execution_table_path(lb):
+  portions = [(float(due_portion), float(sdc_portion)) for due_portion, sdc_portion in due_sdc_rates]
+  digest = hashlib.sha1(repr((float(lb), k_float, portions, MAX_EXECUTION_TIME)).encode()).hexdigest()[:16]
+  return os.path.join(TABLE_DIRECTORY, f"execution_logs_{digest}.npy")
+
+# The table of lb with the current time unit (see set_time_unit()).
+def build_execution_table(lb):
+  lb = float(lb)
+  table = np.empty((len(due_sdc_rates), MAX_EXECUTION_TIME + 1, len(ExecutionLogs._fields)))
+  for index, (due_portion, sdc_portion) in enumerate(due_sdc_rates):
+    for execution_time in range(0, MAX_EXECUTION_TIME + 1):
+      table[index, execution_time] = _compute_execution_logs(lb, k_float, float(due_portion), float(sdc_portion),
+                                                             execution_time)
+  return table
+
+# Memory-map the table of lb with the current time unit for the fast kernels, building and saving it
+# first if there is no file yet. Returns the path of the table.
+def load_execution_table(lb):
+  lb = float(lb)
+  path = execution_table_path(lb)
+  if not os.path.isfile(path):
+    os.makedirs(TABLE_DIRECTORY, exist_ok=True)
+    # Write to a temporary file first, so that a concurrent process never maps a partial table.
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as table_file:
+      np.save(table_file, build_execution_table(lb))
+    os.replace(temporary_path, path)
+    logger.verbose("Built %s", path)
+  # A plain array view of the map, which indexes faster than np.memmap.
+  execution_tables[(lb, k_float)] = np.asarray(np.load(path, mmap_mode='r'))
+  return path
+
+# Probability of a fault in each of the 1 + max_reexec executions of a task from log(1 - p_fault_exec).
+def _fast_p_fault_reexec(log_q_fault, max_reexec):
+  p_fault_exec = -math.expm1(log_q_fault)
+  return _checked(p_fault_exec ** (1 + max_reexec))
+
+def _fast_p_fault_Reghenzani(task, lb, max_reexec):
+  return _fast_p_fault_reexec(_execution_logs(task, lb).log_q_fault, max_reexec)
+
+def _fast_p_due_reexec(task, lb, max_reexec):
+  return _fast_p_fault_reexec(_execution_logs(task, lb).log_q_due, max_reexec)
+
+def _fast_p_fault_RTailor(task, lb, max_reexec):
+  return _fast_p_fault_reexec(_execution_logs(task, lb).log_q_due_sdc, max_reexec)
+
+def _fast_p_sdc(task, lb, max_reexec, max_proact):
+  logs = _execution_logs(task, lb)
+  p_sdc_reexec = 0.0
+  for m in range(1, max_proact + 1): # from 1 to max_proact
+    if m < max_proact:
+      # Eq 14-1
+      p_completed_m = math.exp(_log_binomial_term(1 + max_reexec, m, max_reexec + 1 - m, logs.log_p_due, m, logs.log_q_due))
+    else:
+      # Eq 14-2
+      p_completed_m = sum(math.exp(_log_binomial_term(n - 1, m - 1, n - m, logs.log_p_due, m, logs.log_q_due))
+                          for n in range(m, 2 + max_reexec))
+    # Eq 15
+    p_sdc_m = sum(math.exp(_log_binomial_term(m, m_sdc, m_sdc, logs.log_p1, m - m_sdc, logs.log_p2))
+                  for m_sdc in range(math.ceil(m / 2), m + 1))
+    # Eq 13
+    p_sdc_reexec += p_completed_m * p_sdc_m
+  return _checked(p_sdc_reexec)
+
+def _fast_avg_utilization(task, lb, max_reexec, max_proact):
+  logs = _execution_logs(task, lb)
+  avg_utilization = 0.0
+  for m in range(0, max_proact + 1): # from 0 to max_proact
+    if m < max_proact:
+      p_completed_m = math.exp(_log_binomial_term(1 + max_reexec, m, max_reexec + 1 - m, logs.log_p_due, m, logs.log_q_due))
+      avg_utilization += task.execution_time * (1 + max_reexec) * p_completed_m / task.period
+    else:
+      for n in range(m, 2 + max_reexec): # from M to 1 + N
+        prob = math.exp(_log_binomial_term(n - 1, m - 1, n - m, logs.log_p_due, m, logs.log_q_due))
+        avg_utilization += task.execution_time * n * prob / task.period
+  return _checked(avg_utilization)
+
+# Failure probability allowed in a period by the required failure rate of the task (fr_exec).
+def _fast_fr_exec(task):
+  required_fr = float(required_failure_rates[task.fr_index])
+  return _checked(-math.expm1(task.period / k_float * math.log1p(-required_fr)))
+
+# The result of a kernel, cached by the task parameters and the other arguments: the fast kernel (with lb
+# as a float), or the mpmath kernel if the fast one detects a precision loss.
+# Only the average utilization depends on the period.
+def _cached_kernel(name, fast_kernel, precise_kernel, task, lb, *args, period=None):
+  lb_float = float(lb)
+  key = (name, use_fast_kernels, lb_float, k_float, task.due_portion, task.sdc_portion, task.execution_time,
+         period) + args
+
+  def compute():
+    if use_fast_kernels:
+      result = fast_kernel(task, lb_float, *args)
+      if result is not None:
+        return result
+    return precise_kernel(task, lb, *args)
+  return kernel_cache.get(key, compute)
+
+def compute_p_fault_Reghenzani(task, lb, max_reexec):
+  return _cached_kernel('p_fault_Reghenzani', _fast_p_fault_Reghenzani, compute_p_fault_Reghenzani_mp, task, lb,
+                        max_reexec)
+
+def compute_p_due_reexec(task, lb, max_reexec):
+  return _cached_kernel('p_due_reexec', _fast_p_due_reexec, compute_p_due_reexec_mp, task, lb, max_reexec)
+
+def compute_p_fault_RTailor(task, lb, max_reexec):
+  return _cached_kernel('p_fault_RTailor', _fast_p_fault_RTailor, compute_p_fault_RTailor_mp, task, lb, max_reexec)
+
+def compute_p_sdc(task, lb, max_reexec, max_proact):
+  return _cached_kernel('p_sdc', _fast_p_sdc, compute_p_sdc_mp, task, lb, max_reexec, max_proact)
+
+def compute_avg_utilization(task, lb, max_reexec, max_proact):
+  return _cached_kernel('avg_utilization', _fast_avg_utilization, compute_avg_utilization_mp, task, lb, max_reexec,
+                        max_proact, period=task.period)
+
+def compute_fr_exec(task):
+  key = ('fr_exec', use_fast_kernels, task.fr_index, k_float, task.period)
+
+  def compute():
+    if use_fast_kernels:
+      result = _fast_fr_exec(task)
+      if result is not None:
+        return result
+    return compute_fr_exec_mp(task)
+  return execution_cache.get(key, compute)
+
 ###############################
 def generate_task_set(n, lb, u, base_directory, task_set_id):
   tasks = []
@@ -361,12 +667,7 @@ def generate_task_set(n, lb, u, base_directory, task_set_id):
   avg_utilization_PREFACE = 0
 
   for task in tasks:
-    required_fr = required_failure_rates[task.fr_index]
-    # Calculate fr_exec with mpmath precision
-    required_fr_mp = mpmath.mpf(str(required_fr))
-    period_mp = mpmath.mpf(str(task.period))
-    k_mp = mpmath.mpf(str(k))
-    fr_exec = float(mpmath.mpf('1') - mpmath.power(mpmath.mpf('1') - required_fr_mp, period_mp / k_mp))
+    fr_exec = compute_fr_exec(task)
 
     # Test TMR
     p_due_n_3 = compute_p_due_reexec(task, lb, 3)
@@ -377,80 +678,60 @@ def generate_task_set(n, lb, u, base_directory, task_set_id):
     avg_utilization_TMR += compute_avg_utilization(task, lb, 3, 3)
 
     # Test Reghenzani, RTailor, and PREFACE
-    N_Reghenzani_found = False
-    N_RTailor_found = False
-    N_PREFACE_found = False
-    for max_reexec_cand in range(0, 10):
-      # required_fr = required_failure_rates[task.fr_index] # Allocate a required failure rate.
-      p_due_reexec = compute_p_due_reexec(task, lb, max_reexec_cand)
-      p_sdc_m_1 = compute_p_sdc(task, lb, max_reexec_cand, 1)
-
-      if not N_Reghenzani_found:
-        p_fault_Reghenzani = compute_p_fault_Reghenzani(task, lb, max_reexec_cand)
-        if p_fault_Reghenzani < fr_exec:
-          N_Reghenzani_found = True
-          task.max_reexec_Reghenzani = max_reexec_cand
-          task.new_max_reexec_Reghenzani = max_reexec_cand
-          total_utilization_Reghenzani += task.execution_time * (1 + task.max_reexec_Reghenzani) / task.period
-
-          if p_due_reexec + p_sdc_m_1 > fr_exec:
-            meet_fr_Reghenzani = False
-            if p_sdc_m_1 > fr_exec:
-              new_Reghenzani_possible = False
-            if new_Reghenzani_possible and p_sdc_m_1 < fr_exec:
-              # There's a chance to meet the requirement by increasing N.
-              # Also, until now, there was no task that is impossible to meet the requirement using only N.
-              new_max_reexec_Reghenzani = max_reexec_cand
-              while True:
-                if new_max_reexec_Reghenzani > 10:
-                  sys.exit("n larger than 10")
-                new_p_due_reexec = compute_p_due_reexec(task, lb, new_max_reexec_Reghenzani)
-                if new_p_due_reexec + p_sdc_m_1 < fr_exec:
-                  task.new_max_reexec_Reghenzani = new_max_reexec_Reghenzani
-                  break
-                new_max_reexec_Reghenzani += 1
-          new_total_utilization_Reghenzani += task.execution_time * (1 + task.new_max_reexec_Reghenzani) / task.period
-          avg_utilization_new_Reghenzani += compute_avg_utilization(task, lb, task.new_max_reexec_Reghenzani, 1)
-
-      if not N_RTailor_found:
-        p_fault_RTailor = compute_p_fault_RTailor(task, lb, max_reexec_cand)
-        if p_fault_RTailor < fr_exec:
-          N_RTailor_found = True
-          task.max_reexec_RTailor = max_reexec_cand
-          task.new_max_reexec_RTailor = max_reexec_cand
-          total_utilization_RTailor += task.execution_time * (1 + task.max_reexec_RTailor) / task.period
-
-          if p_due_reexec + p_sdc_m_1 >= fr_exec:
-            meet_fr_RTailor= False
-            if p_sdc_m_1 > fr_exec:
-              new_RTailor_possible = False
-            if new_RTailor_possible and p_sdc_m_1 < fr_exec:
-              # There's a chance to meet the requirement by increasing N.
-              # Also, until now, there was no task that is impossible to meet the requirement using only N.
-              new_max_reexec_RTailor = max_reexec_cand
-              while True:
-                if new_max_reexec_RTailor > 10:
-                  sys.exit("n larger than 10")
-                new_p_due_reexec = compute_p_due_reexec(task, lb, new_max_reexec_RTailor)
-                if new_p_due_reexec + p_sdc_m_1 < fr_exec:
-                  task.new_max_reexec_RTailor = new_max_reexec_RTailor
-                  break
-                new_max_reexec_RTailor += 1
-          new_total_utilization_RTailor += task.execution_time * (1 + task.new_max_reexec_RTailor) / task.period
-          avg_utilization_new_RTailor += compute_avg_utilization(task, lb, task.new_max_reexec_RTailor, 1)
-
-      if not N_PREFACE_found:
-        max_proact_PREFACE = find_max_proactive(task, lb, max_reexec_cand, p_due_reexec)
-        if max_proact_PREFACE != -1:
-          N_PREFACE_found = True
-          task.max_reexec_PREFACE = max_reexec_cand
-          task.max_proact_PREFACE = max_proact_PREFACE
-          total_utilization_PREFACE += task.execution_time * (1 + task.max_reexec_PREFACE) / task.period
-
-          avg_utilization_PREFACE += compute_avg_utilization(task, lb, task.max_reexec_PREFACE, task.max_proact_PREFACE)
-
-      if N_Reghenzani_found and N_RTailor_found and N_PREFACE_found:
-        break
+    # p_fault_reexec = p_exec^(1 + N) decreases with N, so the smallest N meeting fr_exec starts from the
+    # closed form log(fr_exec) / log(p_exec) - 1 (see find_min_reexec()).
+    max_reexec_Reghenzani = find_min_reexec(task, lb, fr_exec, compute_p_fault_Reghenzani)
+    if max_reexec_Reghenzani != -1:
+      task.max_reexec_Reghenzani = max_reexec_Reghenzani
+      task.new_max_reexec_Reghenzani = max_reexec_Reghenzani
+      total_utilization_Reghenzani += task.execution_time * (1 + task.max_reexec_Reghenzani) / task.period
+
+      p_due_reexec = compute_p_due_reexec(task, lb, max_reexec_Reghenzani)
+      p_sdc_m_1 = compute_p_sdc(task, lb, max_reexec_Reghenzani, 1)
+      if p_due_reexec + p_sdc_m_1 > fr_exec:
+        meet_fr_Reghenzani = False
+        if p_sdc_m_1 > fr_exec:
+          new_Reghenzani_possible = False
+        if new_Reghenzani_possible and p_sdc_m_1 < fr_exec:
+          # There's a chance to meet the requirement by increasing N.
+          # Also, until now, there was no task that is impossible to meet the requirement using only N.
+          new_max_reexec_Reghenzani = find_min_reexec_with_sdc(task, lb, fr_exec, max_reexec_Reghenzani, p_sdc_m_1)
+          if new_max_reexec_Reghenzani == -1:
+            sys.exit("n larger than 10")
+          task.new_max_reexec_Reghenzani = new_max_reexec_Reghenzani
+      new_total_utilization_Reghenzani += task.execution_time * (1 + task.new_max_reexec_Reghenzani) / task.period
+      avg_utilization_new_Reghenzani += compute_avg_utilization(task, lb, task.new_max_reexec_Reghenzani, 1)
+
+    max_reexec_RTailor = find_min_reexec(task, lb, fr_exec, compute_p_fault_RTailor)
+    if max_reexec_RTailor != -1:
+      task.max_reexec_RTailor = max_reexec_RTailor
+      task.new_max_reexec_RTailor = max_reexec_RTailor
+      total_utilization_RTailor += task.execution_time * (1 + task.max_reexec_RTailor) / task.period
+
+      p_due_reexec = compute_p_due_reexec(task, lb, max_reexec_RTailor)
+      p_sdc_m_1 = compute_p_sdc(task, lb, max_reexec_RTailor, 1)
+      if p_due_reexec + p_sdc_m_1 >= fr_exec:
+        meet_fr_RTailor= False
+        if p_sdc_m_1 > fr_exec:
+          new_RTailor_possible = False
+        if new_RTailor_possible and p_sdc_m_1 < fr_exec:
+          # There's a chance to meet the requirement by increasing N.
+          # Also, until now, there was no task that is impossible to meet the requirement using only N.
+          new_max_reexec_RTailor = find_min_reexec_with_sdc(task, lb, fr_exec, max_reexec_RTailor, p_sdc_m_1)
+          if new_max_reexec_RTailor == -1:
+            sys.exit("n larger than 10")
+          task.new_max_reexec_RTailor = new_max_reexec_RTailor
+      new_total_utilization_RTailor += task.execution_time * (1 + task.new_max_reexec_RTailor) / task.period
+      avg_utilization_new_RTailor += compute_avg_utilization(task, lb, task.new_max_reexec_RTailor, 1)
+
+    max_reexec_PREFACE, max_proact_PREFACE = find_max_reexec_proact(task, lb)
+    if max_reexec_PREFACE != -1:
+      task.max_reexec_PREFACE = max_reexec_PREFACE
+      task.max_proact_PREFACE = max_proact_PREFACE
+      total_utilization_PREFACE += task.execution_time * (1 + task.max_reexec_PREFACE) / task.period
+
+      avg_utilization_PREFACE += compute_avg_utilization(task, lb, task.max_reexec_PREFACE, task.max_proact_PREFACE)
+
     if task.max_reexec_PREFACE > 2:
       print(f"Warning: N > 2, N = {task.max_reexec_PREFACE}")
 
@@ -528,13 +809,9 @@ def get_u_num(u):
   return None
 
 
-def main_loop(n, lb, lb_unit, u, num_task_sets):
-  global k, required_failure_rates
-  
-  # Convert inputs to mpmath
-  lb_mp = mpmath.mpf(str(lb))
-  u_mp = mpmath.mpf(str(u))
-  
+# Set k and the required failure rates for the time unit of lb.
+def set_time_unit(lb_unit):
+  global k, k_float, required_failure_rates
   if (lb_unit != TimeUnit.HOUR):
     # Convert with high precision
     required_failure_rates = [
@@ -546,6 +823,17 @@ def main_loop(n, lb, lb_unit, u, num_task_sets):
   
   # Calculate k with high precision
   k = mpmath.mpf(TimeUnit.SEC)/(mpmath.mpf(lb_unit) * time_unit)
+  k_float = float(k)
+
+
+def main_loop(n, lb, lb_unit, u, num_task_sets):
+  # Convert inputs to mpmath
+  lb_mp = mpmath.mpf(str(lb))
+  u_mp = mpmath.mpf(str(u))
+  
+  set_time_unit(lb_unit)
+  if use_tables and use_fast_kernels:
+    load_execution_table(lb_mp)
 
   # Get the lb exponent with mpmath
   lb_exponent = int(abs(mpmath.log10(lb_mp)))
@@ -621,6 +909,7 @@ def main_loop(n, lb, lb_unit, u, num_task_sets):
     mean_avg_util_TMR_any = ((mean_avg_util_TMR_any * num_TMR_mp) + 
                              avg_util_TMR_any_mp) / (num_TMR_mp + mpmath.mpf('1'))
 
+  logger.verbose("Kernel caches after %s: %s", base_directory, cache_stats())
   return lb_unit.name + str(lb_exponent), num_Reghenzani_success, num_new_Reghenzani_success, \
     num_RTailor_success, num_new_RTailor_success, num_TMR_success, num_PREFACE_success,\
       float(mean_avg_util_new_Reghenzani), float(mean_avg_util_new_RTailor), float(mean_avg_util_TMR), \
@@ -628,36 +917,30 @@ def main_loop(n, lb, lb_unit, u, num_task_sets):
 
 
 def test(n, lb, lb_unit, u):
-  global k, required_failure_rates
-  
   # Convert inputs to mpmath
   lb_mp = mpmath.mpf(str(lb))
   u_mp = mpmath.mpf(str(u))
   
-  if (lb_unit != TimeUnit.HOUR):
-    # Convert with high precision
-    required_failure_rates = [
-      mpmath.mpf('1') - mpmath.power(mpmath.mpf('1') - rate, mpmath.mpf('1')/mpmath.mpf(str(lb_unit))) 
-      for rate in required_failure_rates_hours
-    ]
-  else:
-    required_failure_rates = required_failure_rates_hours
-  
-  # Calculate k with high precision
-  k = mpmath.mpf(TimeUnit.SEC)/(mpmath.mpf(lb_unit) * time_unit)
+  set_time_unit(lb_unit)
   
   for i in range(0, 1):
     generate_task_set(n, lb_mp, u_mp, "", i)
 
 
 def main():
-  global logger
+  global logger, use_fast_kernels, use_tables
   global p_due_unit, p_benign_unit
   parser = argparse.ArgumentParser(description="Schedulability test with EDF scheduler")
   parser.add_argument('-d', '--debug', action='store_true', help="Debug mode")
   parser.add_argument('-v', '--verbose', action='store_true', help="Verbose mode")
   parser.add_argument('-t', '--test', action='store_true', help="Test")
   parser.add_argument('-n', '--ntask', nargs=1, type=int, help="Num task sets")
+  parser.add_argument('-p', '--precise', action='store_true', help="Always use the mpmath kernels (no float64 fast path)")
+  parser.add_argument('--tables', action='store_true',
+                      help="Look the per-execution probabilities up in memory-mapped tables (built on first use)")
+  parser.add_argument('--build-tables', action='store_true', help="Build the tables of every lambda and exit")
+  parser.add_argument('-c', '--cache-size', type=int, default=100000,
+                      help="Entries of each kernel result cache (0 disables the caches)")
 
   # Parse arguments
   args = parser.parse_args()
@@ -669,6 +952,16 @@ def main():
     print("Verbose Mode.")
     logging.basicConfig(level=CUSTOM_LEVEL)
     logger = logging.getLogger(__name__)
+  if args.precise:
+    use_fast_kernels = False
+  execution_cache.resize(args.cache_size)
+  kernel_cache.resize(args.cache_size)
+  if args.build_tables:
+    set_time_unit(TimeUnit.HOUR)
+    for lb in lambdas:
+      print(f"{lb}: {load_execution_table(lb)}")
+    exit()
+  use_tables = args.tables
   if args.test:
     # To test only 1 task, put 1 as the first argument.
     # Number of tasks, fault rate, total utilization.
@@ -682,7 +975,7 @@ def main():
     df = pd.DataFrame()
     for u in [0.1, 0.2, 0.3, 0.4, 0.5]:
       output = []
-      for lb in [1e-7, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1]:
+      for lb in lambdas:
         # Convert to mpmath for high precision
         lb_mp = mpmath.mpf(str(lb))
         u_mp = mpmath.mpf(str(u))